@@ -0,0 +1,918 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de rendimiento para Selfie vs Selfie
+
+Uso:
+    python benchmark.py decode [--image captura.jpg] [--iterations 200]
+    python benchmark.py features [--hands 2000] [--iterations 200]
+    python benchmark.py batch [--hands 10000]
+    python benchmark.py profiles [--hands 10000]
+    python benchmark.py scale [--hands 10000]
+    python benchmark.py resolution [--dataset capturas/] [--iterations 20]
+    python benchmark.py frame [--iterations 200]
+    python benchmark.py roi [--dataset capturas/] [--iterations 30]
+    python benchmark.py lobby [--rooms 5000] [--iterations 200]
+    python benchmark.py rooms [--rooms 1000] [--iterations 3]
+    python benchmark.py ids [--rooms 50000]
+    python benchmark.py workers [--rooms 400] [--iterations 3]
+"""
+
+import argparse
+import base64
+import io
+import os
+import statistics
+import sys
+import time
+from multiprocessing.managers import BaseManager
+
+import cv2
+import numpy as np
+
+# Los módulos del servidor viven en rps_online/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rps_online'))
+
+# Posición de cada articulación del dedo extendido/doblado relativa a su MCP
+_FINGER_MCPS = {5: (-30, -90), 9: (0, -95), 13: (25, -88), 17: (48, -75)}
+_EXTENDED_OFFSETS = [(0, -35), (0, -60), (0, -80)]
+_FOLDED_OFFSETS = [(2, -25), (6, -10), (4, 8)]
+
+
+def time_call(func, iterations):
+    """
+    Mide una función varias veces.
+
+    Returns:
+        median_us: Mediana del tiempo por llamada en microsegundos
+    """
+    func()  # Calentar
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def synthetic_capture(width=640, height=480, quality=80):
+    """
+    Genera un JPEG parecido a una captura de webcam (degradado + ruido).
+    """
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.dstack([
+        (x * 255 // width),
+        (y * 255 // height),
+        ((x + y) * 255 // (width + height))
+    ]).astype(np.uint8)
+    cv2.circle(image, (width // 2, height // 2), height // 4, (60, 140, 200), -1)
+    noise = np.random.default_rng(0).integers(0, 24, image.shape, dtype=np.uint8)
+    image = cv2.add(image, noise)
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+def load_capture(path):
+    """
+    Carga una captura real desde disco o genera una sintética.
+    """
+    if path:
+        with open(path, 'rb') as f:
+            return f.read()
+    return synthetic_capture()
+
+
+def load_dataset(path):
+    """
+    Carga un set grabado: una carpeta por gesto (rock/, paper/, scissors/,
+    unknown/) con capturas JPEG/PNG.
+
+    Returns:
+        samples: Lista de (imagen BGR, gesto esperado)
+    """
+    samples = []
+    for label in sorted(os.listdir(path)):
+        folder = os.path.join(path, label)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            image = cv2.imread(os.path.join(folder, name))
+            if image is not None:
+                samples.append((image, label))
+    return samples
+
+
+def synthetic_hands(count, seed=0):
+    """
+    Genera un corpus de manos sintéticas (N, 21, 2) en píxeles con poses de
+    piedra, papel, tijeras y combinaciones aleatorias de dedos.
+
+    Args:
+        count: Número de manos
+        seed: Semilla para que el corpus sea reproducible
+
+    Returns:
+        hands: Array int (N, 21, 2)
+    """
+    rng = np.random.default_rng(seed)
+    poses = np.array([
+        [0, 0, 0, 0, 0],  # Piedra
+        [1, 1, 1, 1, 1],  # Papel
+        [0, 1, 1, 0, 0],  # Tijeras
+    ], dtype=bool)
+
+    hands = np.zeros((count, 21, 2))
+    for n in range(count):
+        if rng.random() < 0.75:
+            status = poses[rng.integers(len(poses))]
+        else:
+            status = rng.random(5) < 0.5
+
+        points = np.zeros((21, 2))
+        # Pulgar: CMC, MCP, IP, punta
+        thumb = [(-35, -30), (-60, -50), (-78, -70), (-92, -88)] if status[0] else \
+                [(-35, -30), (-50, -50), (-40, -65), (-25, -70)]
+        points[1:5] = thumb
+        for finger, (mcp, extended) in enumerate(zip(_FINGER_MCPS, status[1:])):
+            spread = (finger - 1.5) * rng.uniform(0, 12) if extended else 0
+            base = np.array(_FINGER_MCPS[mcp], dtype=float)
+            points[mcp] = base
+            offsets = _EXTENDED_OFFSETS if extended else _FOLDED_OFFSETS
+            for joint, (dx, dy) in enumerate(offsets, start=1):
+                points[mcp + joint] = base + (dx + spread * joint, dy)
+
+        # Escala, rotación, traslación y ruido de detección
+        scale = rng.uniform(0.6, 1.6)
+        angle = np.radians(rng.uniform(-20, 20))
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        points = points @ rotation.T * scale
+        points += (rng.uniform(200, 440), rng.uniform(300, 420))
+        points += rng.normal(0, 2, points.shape)
+        hands[n] = points
+
+    return hands.astype(int)
+
+
+class LegacyGestureRecognizer:
+    """
+    Implementación escalar original de GestureRecognizer (bucles de Python y
+    np.sqrt por par de puntos), congelada como referencia para los benchmarks.
+    """
+
+    def count_fingers(self, landmarks):
+        if len(landmarks) != 21:
+            return 0, [False] * 5
+        finger_status = [self._is_thumb_extended(landmarks[4], landmarks[3], landmarks[2])]
+        for tip, pip, mcp in zip([8, 12, 16, 20], [6, 10, 14, 18], [5, 9, 13, 17]):
+            finger_status.append(landmarks[tip][1] < landmarks[pip][1] - 10 and
+                                 landmarks[tip][1] < landmarks[mcp][1])
+        return sum(finger_status), finger_status
+
+    def _is_thumb_extended(self, thumb_tip, thumb_ip, thumb_mcp):
+        tip_to_mcp = np.sqrt((thumb_tip[0] - thumb_mcp[0])**2 + (thumb_tip[1] - thumb_mcp[1])**2)
+        ip_to_mcp = np.sqrt((thumb_ip[0] - thumb_mcp[0])**2 + (thumb_ip[1] - thumb_mcp[1])**2)
+        return tip_to_mcp > ip_to_mcp * 1.2
+
+    def recognize_rock_paper_scissors(self, landmarks):
+        fingers_up, finger_status = self.count_fingers(landmarks)
+        if fingers_up <= 1:
+            if self._is_closed_fist(landmarks):
+                return "rock"
+        elif fingers_up >= 4:
+            if sum(finger_status) >= 4:
+                return "paper"
+        elif fingers_up == 2 or fingers_up == 3:
+            if finger_status[1] and finger_status[2] and self._is_scissors_gesture(landmarks):
+                return "scissors"
+        return "unknown"
+
+    def _is_closed_fist(self, landmarks):
+        palm_center = landmarks[9]
+        close_fingers = 0
+        for tip in [8, 12, 16, 20]:
+            distance = np.sqrt((landmarks[tip][0] - palm_center[0])**2 +
+                               (landmarks[tip][1] - palm_center[1])**2)
+            if distance < 60:
+                close_fingers += 1
+        return close_fingers >= 3
+
+    def _is_scissors_gesture(self, landmarks):
+        index_tip, middle_tip = landmarks[8], landmarks[12]
+        distance_index_middle = np.sqrt((index_tip[0] - middle_tip[0])**2 +
+                                        (index_tip[1] - middle_tip[1])**2)
+        palm_y = landmarks[9][1]
+        return (index_tip[1] < palm_y - 10 and middle_tip[1] < palm_y - 10 and
+                landmarks[16][1] > palm_y - 40 and landmarks[20][1] > palm_y - 40 and
+                distance_index_middle > 20)
+
+    def detect_pointing_gesture(self, landmarks):
+        fingers_up, finger_status = self.count_fingers(landmarks)
+        if fingers_up == 1 and finger_status[1]:
+            dx = landmarks[8][0] - landmarks[5][0]
+            dy = landmarks[8][1] - landmarks[5][1]
+            if abs(dx) > abs(dy):
+                return True, "derecha" if dx > 0 else "izquierda"
+            return True, "arriba" if dy < 0 else "abajo"
+        return False, None
+
+    def detect_thumbs_up_down(self, landmarks):
+        fingers_up, finger_status = self.count_fingers(landmarks)
+        if fingers_up == 1 and finger_status[0]:
+            if landmarks[4][1] < landmarks[2][1] - 30:
+                return "thumbs_up"
+            elif landmarks[4][1] > landmarks[2][1] + 30:
+                return "thumbs_down"
+        return None
+
+    def detect_peace_sign(self, landmarks):
+        fingers_up, finger_status = self.count_fingers(landmarks)
+        if fingers_up >= 2 and finger_status[1] and finger_status[2]:
+            distance = np.sqrt((landmarks[8][0] - landmarks[12][0])**2 +
+                               (landmarks[8][1] - landmarks[12][1])**2)
+            if distance > 35:
+                return True
+        return False
+
+    def get_gesture_info(self, landmarks):
+        fingers_up, finger_status = self.count_fingers(landmarks)
+        is_pointing, point_direction = self.detect_pointing_gesture(landmarks)
+        return {
+            'fingers_count': fingers_up,
+            'finger_status': finger_status,
+            'rps_gesture': self.recognize_rock_paper_scissors(landmarks),
+            'is_pointing': is_pointing,
+            'point_direction': point_direction,
+            'thumbs_gesture': self.detect_thumbs_up_down(landmarks),
+            'is_peace_sign': self.detect_peace_sign(landmarks)
+        }
+
+
+def print_table(headers, rows):
+    """
+    Imprime una tabla simple alineada.
+    """
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def bench_decode(args):
+    """
+    Compara el transporte data URL (base64 + PIL) con el binario (cv2.imdecode).
+    """
+    from PIL import Image
+    from frame_codec import capture_bytes, decode_image
+
+    jpeg = load_capture(args.image)
+    data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+
+    def legacy_path():
+        image_data = data_url.split(',')[1]
+        image_bytes = base64.b64decode(image_data)
+        image = Image.open(io.BytesIO(image_bytes))
+        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+    def binary_path():
+        return decode_image(capture_bytes(jpeg))
+
+    legacy_us = time_call(legacy_path, args.iterations)
+    binary_us = time_call(binary_path, args.iterations)
+
+    height, width = decode_image(jpeg).shape[:2]
+    print(f"📸 Captura: {width}x{height}")
+    print_table(
+        ["Transporte", "Bytes/captura", "Decode (µs)"],
+        [
+            ["data URL (base64)", len(data_url.encode('ascii')), f"{legacy_us:.0f}"],
+            ["binario (imdecode)", len(jpeg), f"{binary_us:.0f}"],
+        ]
+    )
+    print(f"📉 Bytes: -{100 * (1 - len(jpeg) / len(data_url)):.1f}%  "
+          f"⚡ Decode: x{legacy_us / binary_us:.2f}")
+
+
+def bench_features(args):
+    """
+    Compara el coste por frame de get_gesture_info escalar (original) con la
+    extracción de medidas vectorizada y compartida.
+    """
+    from gesture_recognizer import GestureRecognizer
+
+    corpus = [hand.tolist() for hand in synthetic_hands(args.hands)]
+    legacy = LegacyGestureRecognizer()
+    # El original compara píxeles absolutos: sin normalizar la mano
+    recognizer = GestureRecognizer(hand_size=None)
+
+    # Ambas implementaciones deben dar exactamente el mismo resultado
+    keys = ['fingers_count', 'finger_status', 'rps_gesture', 'is_pointing',
+            'point_direction', 'thumbs_gesture', 'is_peace_sign']
+    mismatches = 0
+    for landmarks in corpus:
+        old = legacy.get_gesture_info(landmarks)
+        new = recognizer.get_gesture_info(landmarks)
+        if any(old[k] != new[k] for k in keys):
+            mismatches += 1
+
+    sample = corpus[:args.iterations]
+
+    def run(info):
+        for landmarks in sample:
+            info(landmarks)
+
+    legacy_us = time_call(lambda: run(legacy.get_gesture_info), 5) / len(sample)
+    new_us = time_call(lambda: run(recognizer.get_gesture_info), 5) / len(sample)
+    rps_legacy_us = time_call(lambda: run(legacy.recognize_rock_paper_scissors), 5) / len(sample)
+    rps_new_us = time_call(lambda: run(recognizer.recognize_rock_paper_scissors), 5) / len(sample)
+
+    print(f"✋ Corpus: {len(corpus)} manos sintéticas, diferencias: {mismatches}")
+    print_table(
+        ["Llamada", "Escalar (µs/frame)", "Vectorizado (µs/frame)", "Speedup"],
+        [
+            ["get_gesture_info", f"{legacy_us:.1f}", f"{new_us:.1f}", f"x{legacy_us / new_us:.2f}"],
+            ["recognize_rock_paper_scissors", f"{rps_legacy_us:.1f}", f"{rps_new_us:.1f}",
+             f"x{rps_legacy_us / rps_new_us:.2f}"],
+        ]
+    )
+
+
+def bench_batch(args):
+    """
+    Compara clasificar mano por mano con classify_batch sobre todo el corpus.
+    """
+    from gesture_recognizer import GestureRecognizer
+    from gesture_detector import GestureDetector
+
+    corpus = synthetic_hands(args.hands)
+    hands = [hand.tolist() for hand in corpus]
+    recognizer = GestureRecognizer()
+    detector = GestureDetector(batch_workers=1)
+
+    rows = []
+    for name, one, batch in [
+        ("GestureRecognizer", recognizer.recognize_rock_paper_scissors, recognizer.classify_batch),
+        ("GestureDetector", detector._classify_rps_gesture, detector.classify_batch),
+    ]:
+        # El lote debe coincidir exactamente con la clasificación individual
+        expected = [one(landmarks) for landmarks in hands]
+        mismatches = int(np.count_nonzero(batch(corpus) != np.array(expected)))
+
+        loop_ms = time_call(lambda: [one(landmarks) for landmarks in hands], 3) / 1000
+        batch_ms = time_call(lambda: batch(corpus), 10) / 1000
+        rows.append([name, f"{loop_ms:.1f}", f"{batch_ms:.2f}",
+                     f"x{loop_ms / batch_ms:.0f}", mismatches])
+
+    print(f"✋ Corpus: {len(corpus)} manos sintéticas")
+    print_table(["Clasificador", "Mano a mano (ms)", "Lote (ms)", "Speedup", "Diferencias"], rows)
+
+
+def bench_profiles(args):
+    """
+    Ejecuta todos los perfiles de umbrales de gesture_core sobre el mismo corpus.
+    """
+    from gesture_core import PROFILES, GestureClassifier, GESTURES
+
+    corpus = synthetic_hands(args.hands)
+    hands = [hand.tolist() for hand in corpus]
+
+    rows = []
+    results = {}
+    for profile in sorted(PROFILES):
+        classifier = GestureClassifier(profile)
+        gestures = classifier.classify_batch(corpus)
+        results[profile] = gestures
+
+        sample = hands[:args.iterations]
+        hand_us = time_call(lambda: [classifier.classify(h) for h in sample], 5) / len(sample)
+        batch_ms = time_call(lambda: classifier.classify_batch(corpus), 10) / 1000
+        counts = [int(np.count_nonzero(gestures == g)) for g in GESTURES + ["unknown"]]
+        rows.append([profile, f"{hand_us:.1f}", f"{batch_ms:.2f}", *counts])
+
+    print(f"✋ Corpus: {len(corpus)} manos sintéticas")
+    print_table(["Perfil", "µs/mano", "Lote (ms)", "rock", "paper", "scissors", "unknown"], rows)
+
+    # Qué manos clasifica distinto cada perfil
+    names = sorted(results)
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            differ = results[first] != results[second]
+            print(f"🔀 {first} vs {second}: {int(np.count_nonzero(differ))} manos distintas "
+                  f"({100 * np.mean(differ):.1f}%)")
+
+
+def bench_scale(args):
+    """
+    Simula capturas a menor resolución (mismas manos reducidas) y mide cuántas
+    clasificaciones cambian con píxeles absolutos y con la mano normalizada.
+    """
+    from gesture_core import GestureClassifier
+
+    corpus = synthetic_hands(args.hands).astype(float)
+    rows = []
+    for profile in ['desktop', 'online']:
+        pixels = GestureClassifier(profile, hand_size=None)
+        normalized = GestureClassifier(profile)
+        reference = {
+            'pixels': pixels.classify_batch(corpus),
+            'normalized': normalized.classify_batch(corpus),
+        }
+        for factor in [1.0, 0.75, 0.5, 0.25]:
+            scaled = corpus * factor
+            # Antes los landmarks se truncaban a enteros; ahora llegan en float
+            legacy = pixels.classify_batch(np.floor(scaled))
+            current = normalized.classify_batch(scaled)
+            rows.append([
+                profile, f"{int(640 * factor)}x{int(480 * factor)}",
+                f"{100 * np.mean(legacy == reference['pixels']):.1f}%",
+                f"{100 * np.mean(current == reference['normalized']):.1f}%",
+            ])
+
+    print(f"✋ Corpus: {len(corpus)} manos sintéticas (referencia: 640x480)")
+    print_table(["Perfil", "Resolución", "Iguales (píxeles int)", "Iguales (normalizado)"], rows)
+
+
+def bench_resolution(args):
+    """
+    Latencia, detección y precisión de GestureDetector según la resolución
+    de inferencia, sobre un set grabado (--dataset).
+    """
+    from gesture_detector import GestureDetector
+    from inference_scale import INFERENCE_SIZES
+
+    if args.dataset:
+        samples = load_dataset(args.dataset)
+    else:
+        # Sin set grabado solo se puede medir la latencia
+        print("⚠️ Sin --dataset: captura sintética sin mano, solo latencia")
+        samples = [(cv2.imdecode(np.frombuffer(synthetic_capture(), np.uint8), cv2.IMREAD_COLOR), None)]
+    if not samples:
+        print("❌ El dataset no tiene imágenes")
+        return
+
+    height, width = samples[0][0].shape[:2]
+    print(f"📸 {len(samples)} capturas ({width}x{height})")
+
+    reference = None
+    rows = []
+    for size in [None] + sorted(INFERENCE_SIZES, reverse=True) + ['auto']:
+        detector = GestureDetector(batch_workers=1, inference_size=size)
+        gestures, detected, latencies = [], 0, []
+        for image, _ in samples:
+            repeats = max(1, args.iterations // len(samples))
+            for _ in range(repeats):
+                start = time.perf_counter()
+                gesture = detector.detect_rps_gesture(image)
+                latencies.append((time.perf_counter() - start) * 1000)
+            gestures.append(gesture)
+            detected += detector.scaler.last_score > 0
+        if reference is None:
+            reference = gestures
+
+        labels = [label for _, label in samples]
+        accuracy = (f"{100 * np.mean([g == l for g, l in zip(gestures, labels)]):.1f}%"
+                    if args.dataset else "-")
+        rows.append([
+            size or "completa",
+            f"{statistics.median(latencies):.1f}",
+            f"{100 * detected / len(samples):.1f}%",
+            accuracy,
+            f"{100 * np.mean([g == r for g, r in zip(gestures, reference)]):.1f}%",
+        ])
+        detector.hands.close()
+
+    print_table(["Lado largo", "Latencia (ms)", "Mano detectada", "Precisión", "Igual a completa"], rows)
+
+
+def bench_frame(args):
+    """
+    Coste por frame de HandDetector.detect_hands fuera de MediaPipe: ida y
+    vuelta BGR/RGB con copias (original) frente a una sola conversión sobre
+    un buffer reutilizado y dibujo en el mismo frame.
+    """
+    from types import SimpleNamespace
+    from inference_scale import InferenceScaler
+
+    # Sustituto de Hands sin mano: así solo se mide lo que rodea a process()
+    no_hands = SimpleNamespace(process=lambda image: SimpleNamespace(
+        multi_hand_landmarks=None, multi_handedness=None))
+
+    rows = []
+    for width, height in [(640, 480), (1280, 720)]:
+        frame = cv2.imdecode(np.frombuffer(synthetic_capture(width, height), np.uint8),
+                             cv2.IMREAD_COLOR)
+        scaler = InferenceScaler()
+
+        def legacy():
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image_rgb.flags.writeable = False
+            no_hands.process(image_rgb)
+            image_rgb.flags.writeable = True
+            return cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
+
+        def copy():
+            scaler.process(no_hands, frame)
+            return frame.copy()
+
+        def zero_copy():
+            scaler.process(no_hands, frame)
+            return frame
+
+        times = [time_call(func, args.iterations) for func in (legacy, copy, zero_copy)]
+        rows.append([f"{width}x{height}", *(f"{t:.0f}" for t in times),
+                     f"x{times[0] / times[2]:.2f}", scaler.buffers.allocated])
+
+    print_table(["Frame", "Original (µs)", "Copia (µs)", "zero_copy (µs)", "Speedup",
+                 "Buffers reservados"], rows)
+
+
+def bench_roi(args):
+    """
+    Latencia y píxeles por frame de HandDetector con y sin seguimiento por
+    recorte. Cada captura del set se repite como un video de mano quieta.
+    """
+    from hand_detector import HandDetector
+
+    if not args.dataset:
+        print("❌ Este benchmark necesita capturas con manos (--dataset)")
+        return
+    samples = load_dataset(args.dataset)
+    if not samples:
+        print("❌ El dataset no tiene imágenes")
+        return
+
+    rows = []
+    for roi_tracking in [False, True]:
+        latencies, detected, frames, pixels = [], 0, 0, 0
+        for image, _ in samples:
+            # Detector nuevo por captura: cada una es un "video" independiente
+            detector = HandDetector(max_num_hands=1, roi_tracking=roi_tracking)
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                _, hands_data = detector.detect_hands(image, draw=False, return_image=False)
+                latencies.append((time.perf_counter() - start) * 1000)
+                detected += bool(hands_data)
+                frames += 1
+            pixels += detector.roi_stats['pixels'] if roi_tracking else image.shape[0] * image.shape[1] * args.iterations
+            detector.hands.close()
+            if detector.roi_hands is not None:
+                detector.roi_hands.close()
+
+        rows.append(["recorte" if roi_tracking else "frame completo",
+                     f"{statistics.median(latencies):.1f}",
+                     f"{100 * detected / frames:.1f}%", pixels // frames])
+
+    height, width = samples[0][0].shape[:2]
+    print(f"📸 {len(samples)} capturas ({width}x{height}), {args.iterations} frames cada una")
+    print_table(["Modo", "Latencia (ms)", "Mano detectada", "Píxeles/frame"], rows)
+
+
+def bench_lobby(args):
+    """
+    Coste de armar la lista del lobby: recorrido de todas las salas (original)
+    frente al índice de salas abiertas de RoomRegistry.
+    """
+    from app import GameRoom
+    from room_registry import RoomRegistry
+
+    registry = RoomRegistry()
+    rooms = {}
+    for i in range(args.rooms):
+        room = GameRoom(f"room_{i}")
+        # Mitad de salas llenas, un cuarto contra la IA, el resto abiertas
+        room.is_ai_game = i % 4 == 1
+        for player in range(2 if i % 2 == 0 else 1):
+            room.add_player(f"p{i}_{player}", "jugador")
+        rooms[room.room_id] = room
+        registry.add(room)
+
+    def legacy_scan():
+        available_rooms = []
+        for room_id, room in rooms.items():
+            if not room.is_full() and room.status != 'empty' and not room.is_ai_game:
+                available_rooms.append({
+                    'id': room_id,
+                    'players': len(room.players),
+                    'max_players': 2
+                })
+        return available_rooms
+
+    def lobby_list():
+        return registry.lobby_state()['available_rooms']
+
+    # Publicar la lista inicial, como el primer envío al lobby
+    registry.pop_lobby_delta()
+    assert legacy_scan() == lobby_list()
+
+    # Un cambio en una sala (un jugador entra o sale), su envío y la lista nueva
+    room = rooms['room_3']
+
+    def change_and_snapshot():
+        if 'visitante' in room.players:
+            room.remove_player('visitante')
+        else:
+            room.add_player('visitante', 'visitante')
+        registry.refresh(room.room_id)
+        registry.pop_lobby_delta()
+        return lobby_list()
+
+    scan_us = time_call(legacy_scan, args.iterations)
+    change_us = time_call(change_and_snapshot, args.iterations)
+    cached_us = time_call(lobby_list, args.iterations)
+
+    print(f"🏠 {args.rooms} salas, {len(lobby_list())} abiertas")
+    print_table(
+        ["Lista del lobby", "µs/llamada"],
+        [
+            ["recorrido de todas las salas", f"{scan_us:.1f}"],
+            ["índice tras un cambio y su envío", f"{change_us:.1f}"],
+            ["índice sin cambios (caché)", f"{cached_us:.2f}"],
+        ]
+    )
+
+
+def play_round(host, guest, landmarks, hands):
+    """
+    Una ronda completa: ambos listos, esperar la orden de captura y enviar
+    los gestos con su número de ronda (el servidor descarta los demás).
+    """
+    host.emit('player_ready', {})
+    guest.emit('player_ready', {})
+
+    round_number = None
+    deadline = time.time() + 10
+    while round_number is None:
+        if time.time() > deadline:
+            raise TimeoutError("La sala no llegó a la captura")
+        for event in host.get_received():
+            if event['name'] == 'capture_gesture':
+                round_number = event['args'][0]['round']
+        time.sleep(0.001)
+    guest.get_received()
+
+    for client, hand in ((host, hands[0]), (guest, hands[1])):
+        client.emit('gesture_landmarks', {'landmarks': landmarks[hand], 'round': round_number})
+    host.emit('play_again')
+
+
+def bench_rooms(args):
+    """
+    Estrés de salas concurrentes con los handlers reales de Socket.IO: cada
+    sala juega varias rondas en su propio hilo. Compara un lock por sala con
+    un único lock global (el room_lock original) y mide la espera por lock.
+    """
+    import contextlib
+    import threading
+    # Cuenta atrás inmediata: se mide el manejo de las salas, no la espera
+    os.environ.setdefault('COUNTDOWN_INTERVAL', '0')
+    os.environ.setdefault('SCHEDULER_TICK', '0.001')
+    import app as server
+    from timed_lock import TimedLock, lock_stats
+
+    landmarks = synthetic_hands(3).tolist()
+    rows = []
+
+    for mode in ['global', 'sala']:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Preparar salas con un anfitrión cada una
+            tables = []
+            for i in range(args.rooms):
+                host = server.socketio.test_client(server.app)
+                guest = server.socketio.test_client(server.app)
+                host.emit('join_lobby', {'username': f"anfitrion{i}"})
+                guest.emit('join_lobby', {'username': f"invitado{i}"})
+                host.emit('create_room')
+                room_id = [e for e in host.get_received()
+                           if e['name'] == 'room_created'][0]['args'][0]['room_id']
+                tables.append((room_id, host, guest))
+
+            # Modo original: todas las salas comparten un único lock
+            shared_lock = TimedLock(reentrant=True)
+            if mode == 'global':
+                for room_id, _, _ in tables:
+                    server.game_rooms[room_id].lock = shared_lock
+                locks = [shared_lock]
+            else:
+                locks = [server.game_rooms[room_id].lock for room_id, _, _ in tables]
+                for lock in locks:
+                    lock.acquisitions = 0
+
+            def play(room_id, host, guest):
+                guest.emit('join_room_request', {'room_id': room_id})
+                for round_number in range(args.iterations):
+                    play_round(host, guest, landmarks, (0, round_number % 3))
+                host.disconnect()
+                guest.disconnect()
+
+            threads = [threading.Thread(target=play, args=table) for table in tables]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            room_locks = lock_stats(locks)
+
+        rounds = args.rooms * args.iterations
+        rows.append([f"lock {mode}", f"{elapsed:.2f}", f"{rounds / elapsed:.0f}",
+                     room_locks['contended'], f"{room_locks['avg_wait_ms']:.4f}",
+                     f"{room_locks['max_wait_ms']:.2f}"])
+
+    print(f"🏠 {args.rooms} salas concurrentes, {args.iterations} rondas cada una")
+    print_table(["Modelo", "Tiempo (s)", "Rondas/s", "Esperas", "Espera media (ms)",
+                 "Espera máx (ms)"], rows)
+    print(f"🔒 Lock del registro: {server.game_rooms.stats()['registry_lock']}")
+
+
+def bench_ids(args):
+    """
+    Ráfaga de creación de salas desde varios hilos: IDs del reloj en
+    milisegundos (original) frente a RoomIdAllocator. Cuenta las colisiones,
+    es decir, las veces que RoomRegistry.add() devuelve una sala ajena.
+    """
+    import threading
+    from app import GameRoom
+    from room_ids import RoomIdAllocator
+    from room_registry import RoomRegistry
+
+    threads = 8
+    per_thread = args.rooms // threads
+    allocator = RoomIdAllocator()
+
+    def clock_id():
+        return f"room_{int(time.time() * 1000) % 10000}"
+
+    def allocator_id():
+        return allocator.allocate('room')
+
+    rows = []
+    for name, new_id in [("reloj % 10000", clock_id), ("RoomIdAllocator", allocator_id)]:
+        registry = RoomRegistry()
+        collisions = [0] * threads
+
+        def create(worker):
+            for _ in range(per_thread):
+                room = GameRoom(new_id())
+                if registry.add(room) is not room:
+                    collisions[worker] += 1
+
+        workers = [threading.Thread(target=create, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        created = per_thread * threads
+        rows.append([name, created, sum(collisions), len(registry),
+                     f"{created / elapsed * 60:,.0f}"])
+
+    print(f"🏠 {per_thread * threads} salas creadas desde {threads} hilos")
+    print_table(["IDs", "Creaciones", "Colisiones", "Salas distintas", "Salas/min"], rows)
+
+    # Criterio de carga: 50k salas por minuto sin colisiones
+    allocator_row = rows[-1]
+    ok = allocator_row[2] == 0 and float(allocator_row[4].replace(',', '')) >= 50000
+    print(f"{'✅' if ok else '❌'} RoomIdAllocator: {allocator_row[2]} colisiones "
+          f"a {allocator_row[4]} salas/min (objetivo: 0 a 50,000/min)")
+    if not ok:
+        sys.exit(1)
+
+
+class StoreManager(BaseManager):
+    """
+    Sirve un almacén de estado a varios procesos (ver bench_workers).
+    """
+
+
+def _play_rooms(worker_id, store, rooms, rounds, start_barrier, results):
+    """
+    Proceso de un worker para bench_workers: crea salas y juega rondas con
+    los handlers reales, sin inferencia de imágenes. Dueños de salas y
+    listas del lobby van al almacén compartido por todos los workers.
+    """
+    import contextlib
+
+    os.environ['WORKER_ID'] = worker_id
+    os.environ['INFERENCE_WORKERS'] = '0'
+    os.environ['VISION_LOAD'] = 'lazy'
+    os.environ['COUNTDOWN_INTERVAL'] = '0'
+    os.environ['SCHEDULER_TICK'] = '0.001'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as server
+        server.state_store = store
+        landmarks = synthetic_hands(3).tolist()
+        # Calentar el clasificador de landmarks fuera de la medición
+        server.get_landmark_classifier()
+
+        start_barrier.wait()
+        start = time.perf_counter()
+        for i in range(rooms):
+            host = server.socketio.test_client(server.app)
+            guest = server.socketio.test_client(server.app)
+            host.emit('join_lobby', {'username': f"anfitrion{i}"})
+            guest.emit('join_lobby', {'username': f"invitado{i}"})
+            host.emit('create_room')
+            room_id = [e for e in host.get_received()
+                       if e['name'] == 'room_created'][0]['args'][0]['room_id']
+            guest.emit('join_room_request', {'room_id': room_id})
+            for round_number in range(rounds):
+                play_round(host, guest, landmarks, (0, round_number % 3))
+            host.disconnect()
+            guest.disconnect()
+        elapsed = time.perf_counter() - start
+
+    results.put((worker_id, rooms, elapsed))
+
+
+def bench_workers(args):
+    """
+    Salas por segundo con 1, 2 y 4 procesos worker que comparten un único
+    almacén de estado: un MemoryStore servido por un proceso aparte
+    (multiprocessing.Manager), que hace de Redis con un viaje de ida y
+    vuelta por operación. El total de salas se reparte entre los workers.
+    """
+    import multiprocessing
+    from state_store import MemoryStore
+
+    StoreManager.register('MemoryStore', MemoryStore)
+
+    context = multiprocessing.get_context('spawn')
+    rows = []
+    baseline = None
+
+    for workers in [1, 2, 4]:
+        manager = StoreManager(ctx=context)
+        manager.start()
+        store = manager.MemoryStore()
+
+        per_worker = max(1, args.rooms // workers)
+        start_barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(target=_play_rooms,
+                            args=(f"w{i + 1}", store, per_worker, args.iterations,
+                                  start_barrier, results))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        finished = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        # Todas las salas se cerraron: ninguna debe quedar con dueño
+        store_stats = store.stats()
+        manager.shutdown()
+
+        rooms = sum(rooms for _, rooms, _ in finished)
+        # Todos arrancan juntos: el tiempo total es el del worker más lento
+        elapsed = max(elapsed for _, _, elapsed in finished)
+        rate = rooms / elapsed
+        baseline = baseline or rate
+        rows.append([workers, rooms, f"{elapsed:.2f}", f"{rate:.0f}",
+                     f"{rate * args.iterations:.0f}", f"{rate / baseline:.2f}x",
+                     store_stats['rooms'], store_stats['workers']])
+
+    print(f"🏠 {args.rooms} salas, {args.iterations} rondas cada una, "
+          f"{os.cpu_count()} núcleos disponibles")
+    print_table(["Workers", "Salas", "Tiempo (s)", "Salas/s", "Rondas/s", "Escalado",
+                 "Dueños sin liberar", "Lobbies publicados"], rows)
+    if os.cpu_count() < 4:
+        print("⚠️ Con menos núcleos que workers el escalado no puede verse")
+
+
+BENCHMARKS = {
+    'decode': bench_decode,
+    'features': bench_features,
+    'batch': bench_batch,
+    'profiles': bench_profiles,
+    'scale': bench_scale,
+    'resolution': bench_resolution,
+    'frame': bench_frame,
+    'roi': bench_roi,
+    'lobby': bench_lobby,
+    'rooms': bench_rooms,
+    'ids': bench_ids,
+    'workers': bench_workers,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de Selfie vs Selfie")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--image', help="Captura JPEG real a usar")
+    parser.add_argument('--dataset', help="Carpeta con una subcarpeta de capturas por gesto")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--hands', type=int, default=2000, help="Tamaño del corpus de manos")
+    parser.add_argument('--rooms', type=int, default=5000, help="Salas simultáneas")
+    args = parser.parse_args()
+
+    print(f"🏁 Benchmark: {args.benchmark}")
+    print("=" * 50)
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == '__main__':
+    main()
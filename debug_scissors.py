@@ -18,7 +18,8 @@ def debug_scissors():
     print()
     
     # Inicializar componentes
-    hand_detector = HandDetector(max_num_hands=1, min_detection_confidence=0.7)
+    # Una sola mano: seguirla con un recorte en lugar de procesar todo el frame
+    hand_detector = HandDetector(max_num_hands=1, min_detection_confidence=0.7, roi_tracking=True)
     gesture_recognizer = GestureRecognizer()
     fps_counter = FPSCounter()
     
@@ -41,8 +42,8 @@ def debug_scissors():
         
         frame = cv2.flip(frame, 1)
         
-        # Detectar manos
-        frame, hands_data = hand_detector.detect_hands(frame, draw=True)
+        # Detectar manos (dibujando sobre el frame volteado, sin copiarlo)
+        frame, hands_data = hand_detector.detect_hands(frame, draw=True, zero_copy=True)
         
         # Actualizar FPS
         fps = fps_counter.update()
@@ -51,9 +52,10 @@ def debug_scissors():
         if hands_data:
             landmarks = hands_data[0]['landmarks']
             
-            # Obtener información detallada
-            fingers_up, finger_status = gesture_recognizer.count_fingers(landmarks)
-            rps_gesture = gesture_recognizer.recognize_rock_paper_scissors(landmarks)
+            # Obtener información detallada (medidas calculadas una sola vez)
+            features = gesture_recognizer.extract_features(hands_data[0]['points'])
+            fingers_up, finger_status = gesture_recognizer.count_fingers(landmarks, features)
+            rps_gesture = gesture_recognizer.recognize_rock_paper_scissors(landmarks, features)
             
             # Debug específico para tijeras
             debug_scissors_info(frame, landmarks, finger_status, rps_gesture, gesture_recognizer)
@@ -0,0 +1,185 @@
+"""
+Motor único de clasificación de piedra, papel o tijeras.
+
+Lo usan la app de escritorio (GestureRecognizer) y el servidor online
+(GestureDetector). Las reglas son las mismas; solo cambian los umbrales,
+que se agrupan en perfiles.
+"""
+
+import numpy as np
+
+from hand_features import HAND_SIZE_REFERENCE, extract_hand_features
+
+
+# Umbrales de cada perfil, en píxeles de una mano normalizada a hand_size
+# (muñeca a MCP del medio). Con hand_size = None se comparan los píxeles de
+# la imagen tal cual y el resultado depende de la resolución.
+PROFILES = {
+    # Cámara local de la app de escritorio (main.py)
+    'desktop': {
+        'hand_size': HAND_SIZE_REFERENCE,
+        'fist_radius': 60,              # Punta a palma para contar un dedo cerrado
+        'min_closed_fingers': 3,        # Dedos (sin pulgar) cerca de la palma para piedra
+        'open_hand_rule': 'fingers',    # Papel según los dedos levantados
+        'open_tip_distance': 60,        # Solo para open_hand_rule = 'tip_distance'
+        'min_open_fingers': 4,
+        'scissors_extension': 10,       # Índice y medio sobre la palma
+        'scissors_fold': 40,            # Anular y meñique no más arriba que esto
+        'scissors_separation': 20,      # Separación índice-medio (forma de V)
+        'scissors_requires_index_middle': True,
+    },
+    # Capturas del navegador en el juego online
+    'online': {
+        'hand_size': HAND_SIZE_REFERENCE,
+        'fist_radius': 80,
+        'min_closed_fingers': 3,
+        'open_hand_rule': 'tip_distance',  # Papel según las puntas lejos de la palma
+        'open_tip_distance': 60,
+        'min_open_fingers': 4,
+        'scissors_extension': 15,
+        'scissors_fold': 40,
+        'scissors_separation': 20,
+        'scissors_requires_index_middle': False,
+    },
+}
+
+GESTURES = ["rock", "paper", "scissors"]
+
+
+class GestureClassifier:
+    def __init__(self, profile='desktop', **overrides):
+        """
+        Clasificador de gestos con un perfil de umbrales.
+
+        Args:
+            profile: Nombre del perfil en PROFILES ("desktop" u "online")
+            **overrides: Umbrales que reemplazan a los del perfil
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil de gestos desconocido: {profile}")
+        unknown = set(overrides) - set(PROFILES[profile])
+        if unknown:
+            raise ValueError(f"Umbrales desconocidos: {', '.join(sorted(unknown))}")
+
+        self.profile = profile
+        self.thresholds = dict(PROFILES[profile], **overrides)
+
+    def features(self, landmarks):
+        """
+        Calcula una sola vez el estado de los dedos y las medidas de la mano.
+
+        Returns:
+            features: Diccionario de hand_features.extract_hand_features, o None
+        """
+        return extract_hand_features(landmarks, self.thresholds['hand_size'])
+
+    def classify(self, landmarks, features=None):
+        """
+        Clasifica una mano.
+
+        Args:
+            landmarks: Lista de 21 coordenadas [x, y]
+            features: Medidas ya calculadas con features() (opcional)
+
+        Returns:
+            gesture: "rock", "paper", "scissors", o "unknown"
+        """
+        if features is None:
+            features = self.features(landmarks)
+        if features is None:
+            return "unknown"
+
+        fingers_up = int(features['fingers_up'])
+
+        # Piedra: Puño cerrado (0-1 dedos)
+        if fingers_up <= 1:
+            if self.is_closed_fist(features):
+                return "rock"
+
+        # Papel: Mano abierta (4-5 dedos)
+        elif fingers_up >= 4:
+            if self.is_open_hand(features):
+                return "paper"
+
+        # Tijeras: Índice y medio extendidos (2-3 dedos)
+        elif self.is_scissors(features):
+            return "scissors"
+
+        return "unknown"
+
+    def classify_batch(self, landmarks):
+        """
+        Clasifica muchas manos a la vez con máscaras vectorizadas.
+
+        Args:
+            landmarks: Array (N, 21, 2) con las coordenadas [x, y] de cada mano
+
+        Returns:
+            gestures: Array (N,) con "rock", "paper", "scissors" o "unknown"
+        """
+        features = self.features(landmarks)
+        if features is None or features['points'].ndim != 3:
+            raise ValueError("Se esperaba un array de landmarks con forma (N, 21, 2)")
+
+        fingers_up = features['fingers_up']
+
+        # Mismas reglas que classify, como máscaras
+        rock = (fingers_up <= 1) & self.is_closed_fist(features)
+        paper = (fingers_up >= 4) & self.is_open_hand(features)
+        scissors = ((fingers_up == 2) | (fingers_up == 3)) & self.is_scissors(features)
+
+        return np.select([rock, paper, scissors], GESTURES, default="unknown")
+
+    # Las reglas aceptan medidas de una mano o de un lote (última dimensión)
+
+    def is_closed_fist(self, features):
+        """
+        Verifica si es un puño cerrado.
+        """
+        # Puntas de índice a meñique cerca del centro de la palma
+        distances = features['tip_palm_distances'][..., 1:]
+        close_fingers = (distances < self.thresholds['fist_radius']).sum(axis=-1)
+
+        return close_fingers >= self.thresholds['min_closed_fingers']
+
+    def is_open_hand(self, features):
+        """
+        Verifica si es una mano abierta.
+        """
+        if self.thresholds['open_hand_rule'] == 'tip_distance':
+            # Las puntas (pulgar incluido) lejos del centro de la palma
+            distances = features['tip_palm_distances']
+            extended_fingers = (distances > self.thresholds['open_tip_distance']).sum(axis=-1)
+        else:
+            extended_fingers = features['fingers_up']
+
+        return extended_fingers >= self.thresholds['min_open_fingers']
+
+    def is_scissors(self, features):
+        """
+        Verifica si es el gesto de tijeras.
+        """
+        # Puntas: pulgar, índice, medio, anular, meñique (una columna por dedo)
+        _, index_y, middle_y, ring_y, pinky_y = features['tips_y'].T
+        palm_y = features['palm_y']
+        extension = self.thresholds['scissors_extension']
+        fold = self.thresholds['scissors_fold']
+
+        # Índice y medio arriba de la palma
+        index_extended = index_y < palm_y - extension
+        middle_extended = middle_y < palm_y - extension
+
+        # Anular y meñique cerca del nivel de la palma o abajo
+        ring_folded = ring_y > palm_y - fold
+        pinky_folded = pinky_y > palm_y - fold
+
+        # Índice y medio separados (formando V)
+        fingers_separated = features['index_middle_distance'] > self.thresholds['scissors_separation']
+
+        scissors = (index_extended & middle_extended &
+                    ring_folded & pinky_folded & fingers_separated)
+        if self.thresholds['scissors_requires_index_middle']:
+            finger_status = features['finger_status']
+            scissors = scissors & finger_status[..., 1] & finger_status[..., 2]
+
+        return scissors
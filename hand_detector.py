@@ -1,11 +1,16 @@
+import time
 import cv2
 import mediapipe as mp
 import numpy as np
+from inference_scale import InferenceScaler
+from utils import extrapolate_landmarks, smooth_landmarks
 
 
 class HandDetector:
     def __init__(self, static_image_mode=False, max_num_hands=2, 
-                 min_detection_confidence=0.7, min_tracking_confidence=0.5):
+                 min_detection_confidence=0.7, min_tracking_confidence=0.5,
+                 inference_size=None, min_inference_confidence=0.9,
+                 roi_tracking=False, roi_padding=0.6, roi_full_search_every=30):
         """
         Inicializa el detector de manos usando MediaPipe.
         
@@ -14,6 +19,18 @@ class HandDetector:
             max_num_hands: Número máximo de manos a detectar
             min_detection_confidence: Confianza mínima para detección
             min_tracking_confidence: Confianza mínima para tracking
+            inference_size: Lado largo (px) al que se reduce el frame antes de
+                MediaPipe; None usa la resolución completa y "auto" elige la
+                menor que mantiene la confianza sobre min_inference_confidence
+            min_inference_confidence: Confianza mínima del modo "auto"
+            roi_tracking: Si True, tras detectar una mano solo se procesa un
+                recorte alrededor de ella; si se pierde, se busca en todo el
+                frame. Los recortes van a una instancia de MediaPipe aparte en
+                modo imagen: procesa menos píxeles pero detecta en cada frame
+                en vez de seguir la mano, así que no baja la latencia
+            roi_padding: Margen del recorte, en proporción al tamaño de la mano
+            roi_full_search_every: Cada cuántos frames con recorte se vuelve
+                a buscar en todo el frame (por si entra otra mano)
         """
         self.static_image_mode = static_image_mode
         self.max_num_hands = max_num_hands
@@ -34,28 +51,66 @@ class HandDetector:
         # Conexiones de los puntos clave
         self.hand_connections = self.mp_hands.HAND_CONNECTIONS
         
-    def detect_hands(self, image, draw=True):
+        # Resolución de inferencia (en video, los cambios rigen desde el
+        # siguiente frame; con imágenes sueltas se reintenta el mismo)
+        self.scaler = InferenceScaler(
+            inference_size,
+            min_confidence=min_inference_confidence,
+            retry=static_image_mode
+        )
+        
+        # Seguimiento por región de interés (x0, y0, x1, y1)
+        self.roi_tracking = roi_tracking
+        self.roi_padding = roi_padding
+        self.roi_full_search_every = roi_full_search_every
+        self.roi = None
+        self._roi_frames = 0
+        # El recorte cambia de origen y tamaño en cada frame: el seguimiento
+        # de la instancia de video quedaría en coordenadas del recorte
+        # anterior, así que cada recorte se procesa como imagen suelta
+        self.roi_hands = None
+        self.roi_scaler = None
+        if roi_tracking:
+            self.roi_hands = self.mp_hands.Hands(
+                static_image_mode=True,
+                max_num_hands=self.max_num_hands,
+                min_detection_confidence=0.8,
+                model_complexity=1
+            )
+            self.roi_scaler = InferenceScaler(
+                inference_size,
+                min_confidence=min_inference_confidence,
+                retry=True
+            )
+        self.roi_stats = {'roi_frames': 0, 'full_frames': 0, 'lost': 0, 'pixels': 0}
+        
+    def detect_hands(self, image, draw=True, zero_copy=False, return_image=True):
         """
         Detecta manos en una imagen y opcionalmente dibuja los landmarks.
         
         Args:
             image: Imagen de entrada (BGR)
             draw: Si True, dibuja los landmarks en la imagen
+            zero_copy: Si True, dibuja directamente sobre el frame recibido
+                en lugar de sobre una copia
+            return_image: Si False (y draw=False) no se devuelve imagen,
+                solo los landmarks
             
         Returns:
-            image: Imagen con landmarks dibujados (si draw=True)
+            image: Imagen con landmarks dibujados (si draw=True), o None si
+                return_image=False
             hands_data: Lista con información de las manos detectadas
         """
-        # Convertir BGR a RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_rgb.flags.writeable = False
-        
-        # Procesar la imagen
-        results = self.hands.process(image_rgb)
+        # Procesar la imagen (o el recorte, reducido si corresponde); los
+        # landmarks quedan normalizados respecto del frame original
+        results = self._process(image)
+        h, w = image.shape[:2]
         
-        # Convertir de vuelta a BGR
-        image_rgb.flags.writeable = True
-        image = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2BGR)
+        if not draw and not return_image:
+            image = None
+        elif not zero_copy:
+            # Dibujar sobre una copia para no modificar el frame de entrada
+            image = image.copy()
         
         hands_data = []
         
@@ -65,16 +120,14 @@ class HandDetector:
                 hand_label = results.multi_handedness[idx].classification[0].label
                 hand_score = results.multi_handedness[idx].classification[0].score
                 
-                # Extraer coordenadas de los landmarks
-                landmarks = []
-                h, w, c = image.shape
-                
-                for lm in hand_landmarks.landmark:
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    landmarks.append([cx, cy])
+                # Extraer coordenadas de los landmarks: enteras para dibujar y
+                # en float (sin redondeo) para clasificar
+                points = np.array([[lm.x * w, lm.y * h] for lm in hand_landmarks.landmark])
+                landmarks = points.astype(int).tolist()
                 
                 hands_data.append({
                     'landmarks': landmarks,
+                    'points': points,
                     'label': hand_label,
                     'score': hand_score,
                     'raw_landmarks': hand_landmarks
@@ -95,6 +148,80 @@ class HandDetector:
         
         return image, hands_data
     
+    def _process(self, image):
+        """
+        Ejecuta MediaPipe sobre el recorte de la mano seguida o, si no hay
+        seguimiento (o se perdió la mano), sobre todo el frame.
+        """
+        h, w = image.shape[:2]
+        
+        if self.roi_tracking and self.roi is not None and \
+                self._roi_frames < self.roi_full_search_every:
+            x0, y0, x1, y1 = self.roi
+            # Vista del frame, sin copiar
+            results = self.roi_scaler.process(self.roi_hands, image[y0:y1, x0:x1])
+            self.roi_stats['pixels'] += (x1 - x0) * (y1 - y0)
+            if results.multi_hand_landmarks:
+                self.roi_stats['roi_frames'] += 1
+                self._roi_frames += 1
+                # Llevar los landmarks del recorte al frame completo
+                for hand_landmarks in results.multi_hand_landmarks:
+                    for lm in hand_landmarks.landmark:
+                        lm.x = (x0 + lm.x * (x1 - x0)) / w
+                        lm.y = (y0 + lm.y * (y1 - y0)) / h
+                self.roi = self._compute_roi(results, w, h)
+                return results
+            self.roi_stats['lost'] += 1
+        
+        results = self.scaler.process(self.hands, image)
+        self.roi_stats['full_frames'] += 1
+        self.roi_stats['pixels'] += w * h
+        self._roi_frames = 0
+        self.roi = self._compute_roi(results, w, h) if self.roi_tracking else None
+        return results
+    
+    def _compute_roi(self, results, w, h):
+        """
+        Recorte cuadrado alrededor de las manos detectadas: centro como
+        get_hand_center y lado según la extensión de los landmarks más el margen.
+        """
+        if not results.multi_hand_landmarks:
+            return None
+        
+        landmarks = [[lm.x * w, lm.y * h]
+                     for hand_landmarks in results.multi_hand_landmarks
+                     for lm in hand_landmarks.landmark]
+        center_x, center_y = self.get_hand_center(landmarks)
+        extent = max(max(abs(x - center_x), abs(y - center_y)) for x, y in landmarks)
+        half = max(48, extent * (1 + self.roi_padding))
+        
+        x0, y0 = max(0, int(center_x - half)), max(0, int(center_y - half))
+        x1, y1 = min(w, int(center_x + half)), min(h, int(center_y + half))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+    
+    def draw_points(self, image, landmarks, label=None, score=None):
+        """
+        Dibuja una mano a partir de coordenadas en píxeles (por ejemplo,
+        landmarks predichos que no vienen de MediaPipe).
+        
+        Args:
+            image: Imagen donde dibujar
+            landmarks: Lista de 21 coordenadas [x, y] enteras
+            label, score: Etiqueta y confianza a mostrar (opcional)
+        """
+        # Mismos colores que draw_landmarks: conexiones azules, puntos verdes
+        for start, end in self.hand_connections:
+            cv2.line(image, tuple(landmarks[start]), tuple(landmarks[end]), (255, 0, 0), 2)
+        for point in landmarks:
+            cv2.circle(image, tuple(point), 2, (0, 255, 0), 2)
+        
+        if label is not None:
+            cv2.putText(image, f"{label} ({score:.2f})", 
+                      (landmarks[0][0], landmarks[0][1] - 20),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    
     def get_finger_positions(self, landmarks):
         """
         Obtiene las posiciones de las puntas de los dedos.
@@ -150,4 +277,123 @@ class HandDetector:
         center_x = sum(x_coords) // len(x_coords)
         center_y = sum(y_coords) // len(y_coords)
         
-        return [center_x, center_y]
\ No newline at end of file
+        return [center_x, center_y]
+
+
+class AdaptiveFrameSkipper:
+    def __init__(self, detector, target_fps=30, max_skip=4, alpha=0.6, cooldown=30):
+        """
+        Ejecuta MediaPipe solo en uno de cada `skip` frames. En los demás
+        predice los landmarks extrapolando las dos últimas detecciones y los
+        suaviza como utils.smooth_landmarks. `skip` se ajusta según los FPS
+        medidos para sostener la frecuencia de la cámara.
+        
+        Args:
+            detector: HandDetector usado en los frames con inferencia
+            target_fps: FPS a sostener (los de la cámara)
+            max_skip: Máximo de frames por cada inferencia
+            alpha: Factor de suavizado de los landmarks predichos (0-1)
+            cooldown: Frames a esperar entre cambios de `skip`
+        """
+        self.detector = detector
+        self.target_fps = target_fps or 30
+        self.max_skip = max_skip
+        self.alpha = alpha
+        self.cooldown = cooldown
+        
+        self.skip = 1
+        self.inference_ms = 0.0  # Promedio móvil del tiempo de inferencia
+        self._since_inference = 0
+        self._frames_since_change = 0
+        self._tracks = {}  # Etiqueta de la mano -> detecciones recientes
+        
+        # Métricas
+        self.inferred_frames = 0
+        self.predicted_frames = 0
+    
+    def detect_hands(self, image, draw=True, zero_copy=False):
+        """
+        Igual que HandDetector.detect_hands, pero con inferencia solo cada
+        `skip` frames. Las manos predichas llevan 'predicted': True y
+        'raw_landmarks': None.
+        """
+        if self._since_inference + 1 >= self.skip:
+            return self._infer(image, draw, zero_copy)
+        
+        self._since_inference += 1
+        self.predicted_frames += 1
+        if not zero_copy:
+            image = image.copy()
+        
+        hands_data = []
+        for label, track in self._tracks.items():
+            # Avance desde la última detección, en intervalos entre detecciones
+            steps = self._since_inference / track['interval']
+            predicted = extrapolate_landmarks(track['last'], track['previous'], steps)
+            shown = smooth_landmarks(predicted, track['shown'], self.alpha, round_to_int=False)
+            track['shown'] = shown
+            
+            points = np.array(shown)
+            landmarks = points.astype(int).tolist()
+            hands_data.append({
+                'landmarks': landmarks,
+                'points': points,
+                'label': label,
+                'score': track['score'],
+                'raw_landmarks': None,
+                'predicted': True
+            })
+            if draw:
+                self.detector.draw_points(image, landmarks, label, track['score'])
+        
+        return image, hands_data
+    
+    def _infer(self, image, draw, zero_copy):
+        start = time.perf_counter()
+        image, hands_data = self.detector.detect_hands(image, draw=draw, zero_copy=zero_copy)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.inference_ms = elapsed_ms if not self.inferred_frames else \
+            0.8 * self.inference_ms + 0.2 * elapsed_ms
+        self.inferred_frames += 1
+        
+        # Frames entre esta detección y la anterior
+        interval = self._since_inference + 1
+        self._since_inference = 0
+        
+        tracks = {}
+        for hand_data in hands_data:
+            hand_data['predicted'] = False
+            previous = self._tracks.get(hand_data['label'])
+            points = hand_data['points'].tolist()
+            tracks[hand_data['label']] = {
+                'last': points,
+                'previous': previous['last'] if previous else None,
+                'interval': interval,
+                'shown': points,
+                'score': hand_data['score']
+            }
+        self._tracks = tracks
+        
+        return image, hands_data
+    
+    def adapt(self, fps):
+        """
+        Ajusta `skip` con los FPS medidos (por ejemplo, los de FPSCounter).
+        
+        Args:
+            fps: FPS promedio actuales
+        """
+        self._frames_since_change += 1
+        if self._frames_since_change < self.cooldown:
+            return
+        
+        budget_ms = 1000 / self.target_fps
+        if fps < self.target_fps * 0.9 and self.skip < self.max_skip:
+            # No se llega a la frecuencia de la cámara: inferir menos seguido
+            self.skip += 1
+            self._frames_since_change = 0
+        elif (fps >= self.target_fps * 0.95 and self.skip > 1 and
+              self.inference_ms / (self.skip - 1) < budget_ms * 0.5):
+            # Hay margen: volver a inferir más seguido
+            self.skip -= 1
+            self._frames_since_change = 0
@@ -0,0 +1,134 @@
+import numpy as np
+
+
+# Índices de los landmarks de MediaPipe Hands
+WRIST = 0
+THUMB_TIP, THUMB_IP, THUMB_MCP = 4, 3, 2
+INDEX_TIP, MIDDLE_TIP = 8, 12
+PALM_CENTER = 9
+FINGER_TIPS = [8, 12, 16, 20]   # Índice, medio, anular, meñique
+FINGER_PIPS = [6, 10, 14, 18]   # Articulaciones proximales
+FINGER_MCPS = [5, 9, 13, 17]    # Articulaciones metacarpianas
+ALL_TIPS = [4, 8, 12, 16, 20]   # Pulgar incluido
+
+# Tamaño de referencia de la mano (muñeca a MCP del medio) en píxeles: los
+# umbrales de los clasificadores están pensados para una mano de este tamaño
+HAND_SIZE_REFERENCE = 100
+
+# Un dedo está levantado si la punta está al menos este margen sobre el PIP
+FINGER_PIP_MARGIN = 10
+# El pulgar está extendido si punta-MCP supera IP-MCP por este factor
+THUMB_EXTENSION_RATIO = 1.2
+
+# Todas las distancias se calculan de una vez: pares (origen, destino)
+_DISTANCE_PAIRS = [
+    (THUMB_TIP, THUMB_MCP),
+    (THUMB_IP, THUMB_MCP),
+    (4, PALM_CENTER),
+    (8, PALM_CENTER),
+    (12, PALM_CENTER),
+    (16, PALM_CENTER),
+    (20, PALM_CENTER),
+    (INDEX_TIP, MIDDLE_TIP),
+]
+_PAIR_INDICES = np.array([a for a, _ in _DISTANCE_PAIRS] + [b for _, b in _DISTANCE_PAIRS])
+# Coordenadas Y leídas con un solo acceso: puntas (pulgar incluido), PIPs,
+# MCPs y centro de la palma
+_Y_INDICES = np.array(ALL_TIPS + FINGER_PIPS + FINGER_MCPS + [PALM_CENTER])
+
+
+def hand_scale(points):
+    """
+    Tamaño de la mano: distancia de la muñeca al MCP del dedo medio.
+
+    Args:
+        points: Array (21, 2) o (N, 21, 2)
+
+    Returns:
+        scale: Escalar o array (N,) en las unidades de los puntos
+    """
+    diff = points[..., PALM_CENTER, :] - points[..., WRIST, :]
+    return np.sqrt(diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1])
+
+
+def normalize_hand(points, hand_size=HAND_SIZE_REFERENCE):
+    """
+    Reescala la mano alrededor de la muñeca para que mida hand_size.
+
+    El resultado no depende de la resolución de la imagen ni de la distancia
+    a la cámara, así que los umbrales en píxeles valen para cualquier tamaño.
+
+    Args:
+        points: Array float (21, 2) o (N, 21, 2)
+        hand_size: Tamaño de referencia de la mano
+
+    Returns:
+        normalized: Array con la misma forma
+        scale: Tamaño original de cada mano (ver hand_scale)
+    """
+    scale = hand_scale(points)
+    # Una mano degenerada (muñeca sobre el MCP) no se reescala
+    factor = hand_size / np.where(scale > 0, scale, hand_size)
+    wrist = points[..., WRIST:WRIST + 1, :]
+    normalized = (points - wrist) * np.expand_dims(factor, (-1, -2)) + wrist
+    return normalized, scale
+
+
+def extract_hand_features(landmarks, hand_size=None):
+    """
+    Calcula una sola vez todas las medidas de la mano que usan los clasificadores.
+
+    Acepta una mano (21 puntos [x, y]) o un lote con forma (N, 21, 2); en ese
+    caso cada valor del resultado tiene una dimensión N al inicio.
+
+    Args:
+        landmarks: Lista o array de coordenadas [x, y] de los landmarks
+        hand_size: Si se indica, la mano se normaliza a este tamaño antes de
+            medir (ver normalize_hand); None usa los píxeles tal cual
+
+    Returns:
+        features: Diccionario con las medidas de la mano, o None si los
+            landmarks no tienen la forma esperada
+    """
+    try:
+        points = np.asarray(landmarks, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    if points.ndim < 2 or points.shape[-2:] != (21, 2):
+        return None
+
+    if hand_size is None:
+        scale = None
+    else:
+        points, scale = normalize_hand(points, hand_size)
+
+    # Distancias euclidianas de todos los pares en una operación
+    pairs = points[..., _PAIR_INDICES, :]
+    diffs = pairs[..., :8, :] - pairs[..., 8:, :]
+    squared = diffs * diffs
+    distances = np.sqrt(squared[..., 0] + squared[..., 1])
+
+    ys = points[..., _Y_INDICES, 1]
+    tips_y = ys[..., 1:5]
+
+    # Pulgar por distancias; los otros dedos si la punta está sobre el PIP
+    # (con margen) y sobre el MCP
+    thumb_extended = distances[..., 0:1] > distances[..., 1:2] * THUMB_EXTENSION_RATIO
+    fingers_extended = tips_y < np.minimum(ys[..., 5:9] - FINGER_PIP_MARGIN, ys[..., 9:13])
+    finger_status = np.concatenate((thumb_extended, fingers_extended), axis=-1)
+
+    return {
+        # Puntos ya normalizados si se indicó hand_size
+        'points': points,
+        # Tamaño original de la mano (None sin normalizar)
+        'hand_scale': scale,
+        # Pulgar, índice, medio, anular, meñique
+        'finger_status': finger_status,
+        'fingers_up': finger_status.sum(axis=-1),
+        # Distancia de cada punta (pulgar incluido) al centro de la palma
+        'tip_palm_distances': distances[..., 2:7],
+        'index_middle_distance': distances[..., 7],
+        'palm_y': ys[..., 13],
+        # Coordenadas Y de las puntas (pulgar incluido)
+        'tips_y': ys[..., 0:5],
+    }
@@ -0,0 +1,215 @@
+"""
+Resolución de entrada de MediaPipe Hands.
+
+Reducir el frame antes de cvtColor/process ahorra CPU. Los landmarks que
+devuelve MediaPipe están normalizados a [0-1], así que se proyectan a la
+imagen original multiplicando por su ancho y alto, igual que sin reducir.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+# Lado largo (píxeles) que prueba el modo automático, de menor a mayor
+INFERENCE_SIZES = [192, 256, 320, 480, 640]
+
+
+def parse_inference_size(value):
+    """
+    Interpreta la resolución de inferencia de la configuración.
+
+    Args:
+        value: None/"" (resolución completa), "auto" o un número de píxeles
+
+    Returns:
+        inference_size: None, "auto" o un int
+    """
+    if value in (None, '', 'full'):
+        return None
+    if value == 'auto':
+        return 'auto'
+    size = int(value)
+    if size <= 0:
+        raise ValueError(f"Resolución de inferencia inválida: {value}")
+    return size
+
+
+def inference_shape(image, long_edge):
+    """
+    Forma (alto, ancho, canales) de la imagen reducida para que su lado largo
+    mida long_edge, manteniendo la proporción. Nunca amplía.
+
+    Returns:
+        shape: Nueva forma, o None si no hace falta reducir
+    """
+    h, w = image.shape[:2]
+    if long_edge is None or max(h, w) <= long_edge:
+        return None
+    scale = long_edge / max(h, w)
+    return (max(1, round(h * scale)), max(1, round(w * scale))) + image.shape[2:]
+
+
+def resize_long_edge(image, long_edge):
+    """
+    Reduce la imagen para que su lado largo mida long_edge, manteniendo la
+    proporción. Nunca amplía.
+
+    Args:
+        image: Imagen de OpenCV
+        long_edge: Lado largo deseado en píxeles (None = sin cambios)
+
+    Returns:
+        image: Imagen reducida (o la misma si ya es más pequeña)
+    """
+    shape = inference_shape(image, long_edge)
+    if shape is None:
+        return image
+    return cv2.resize(image, (shape[1], shape[0]), interpolation=cv2.INTER_AREA)
+
+
+class FrameBufferPool:
+    """
+    Buffers uint8 reutilizables por forma, para no reservar un frame nuevo
+    (reducido o RGB) en cada llamada a MediaPipe.
+    """
+
+    def __init__(self):
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocated = 0
+
+    def acquire(self, shape):
+        """
+        Toma un buffer libre con esa forma o reserva uno nuevo.
+        """
+        with self._lock:
+            free = self._free.get(shape)
+            if free:
+                return free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+
+    def release(self, *buffers):
+        """
+        Devuelve buffers al pool.
+        """
+        with self._lock:
+            for buffer in buffers:
+                if buffer is not None:
+                    self._free.setdefault(buffer.shape, []).append(buffer)
+
+
+def best_hand_score(results):
+    """
+    Mayor confianza entre las manos detectadas (0.0 si no hay ninguna).
+    """
+    if not results.multi_hand_landmarks or not results.multi_handedness:
+        return 0.0
+    return max(hand.classification[0].score for hand in results.multi_handedness)
+
+
+class InferenceScaler:
+    def __init__(self, inference_size=None, min_confidence=0.9, sizes=None,
+                 retry=False, stable_frames=30):
+        """
+        Elige a qué resolución se ejecuta MediaPipe.
+
+        Args:
+            inference_size: None (resolución completa), lado largo fijo en
+                píxeles o "auto"
+            min_confidence: En modo "auto", confianza mínima de la mano; si no
+                se alcanza se sube de resolución
+            sizes: Resoluciones que prueba el modo "auto" (de menor a mayor)
+            retry: Si True, un frame que no alcanza la confianza se vuelve a
+                procesar a la siguiente resolución (capturas sueltas). Si es
+                False, la subida se aplica desde el siguiente frame (video)
+            stable_frames: Frames seguidos con buena confianza antes de
+                probar una resolución menor
+        """
+        self.inference_size = parse_inference_size(inference_size)
+        self.min_confidence = min_confidence
+        self.sizes = sorted(sizes or INFERENCE_SIZES)
+        self.retry = retry
+        self.stable_frames = stable_frames
+
+        # Estado del modo automático: se empieza en un término medio
+        self._level = min(2, len(self.sizes) - 1)
+        self._stable = 0
+
+        # Buffers reducido/RGB reutilizados entre frames (uno por hilo activo)
+        self.buffers = FrameBufferPool()
+
+        # Métricas
+        self.last_size = None
+        self.last_score = 0.0
+        self.frames_by_size = {}
+
+    def process(self, hands, image):
+        """
+        Ejecuta hands.process sobre la imagen BGR a la resolución elegida.
+
+        Args:
+            hands: Instancia de MediaPipe Hands
+            image: Imagen BGR de OpenCV (no se modifica)
+
+        Returns:
+            results: Resultado de MediaPipe (landmarks normalizados a [0-1])
+        """
+        if self.inference_size != 'auto':
+            return self._run(hands, image, self.inference_size)
+
+        while True:
+            results = self._run(hands, image, self.sizes[self._level])
+            if self.last_score >= self.min_confidence:
+                self._stable += 1
+                # Tras un rato estable, probar una resolución menor
+                if self._stable >= self.stable_frames and self._level > 0:
+                    self._level -= 1
+                    self._stable = 0
+                return results
+
+            self._stable = 0
+            # Sin resolución mayor disponible (o la imagen ya es así de chica)
+            if self._level == len(self.sizes) - 1 or self.sizes[self._level] >= max(image.shape[:2]):
+                return results
+            self._level += 1
+            if not self.retry:
+                return results
+
+    def _run(self, hands, image, long_edge):
+        shape = inference_shape(image, long_edge)
+        small = None
+        source = image
+        if shape is not None:
+            small = self.buffers.acquire(shape)
+            cv2.resize(image, (shape[1], shape[0]), dst=small, interpolation=cv2.INTER_AREA)
+            source = small
+
+        # Única conversión de color, sobre un buffer reutilizado
+        image_rgb = self.buffers.acquire(source.shape)
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=image_rgb)
+        # De solo lectura, MediaPipe lo usa sin copiarlo; process() espera a
+        # que el grafo termine, así que después el buffer se puede reutilizar
+        image_rgb.flags.writeable = False
+        try:
+            results = hands.process(image_rgb)
+        finally:
+            image_rgb.flags.writeable = True
+            self.buffers.release(small, image_rgb)
+
+        self.last_size = max(source.shape[:2])
+        self.last_score = best_hand_score(results)
+        self.frames_by_size[self.last_size] = self.frames_by_size.get(self.last_size, 0) + 1
+        return results
+
+    def stats(self):
+        """
+        Resolución actual y frames procesados por resolución.
+        """
+        return {
+            'mode': self.inference_size or 'full',
+            'last_size': self.last_size,
+            'last_score': round(self.last_score, 3),
+            'frames_by_size': dict(self.frames_by_size)
+        }
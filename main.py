@@ -1,24 +1,42 @@
+import argparse
+import os
+import threading
+import time
 import cv2
 import numpy as np
-from hand_detector import HandDetector
+from hand_detector import AdaptiveFrameSkipper, HandDetector
 from gesture_recognizer import GestureRecognizer
-from utils import FPSCounter, draw_gesture_info, draw_controls_info, save_screenshot
+from utils import FPSCounter, LatestFrameQueue, draw_gesture_info, draw_controls_info, save_screenshot
 
 
 class HandGestureApp:
-    def __init__(self):
+    def __init__(self, frame_skip=False, roi_tracking=False):
         """
         Inicializa la aplicación de reconocimiento de gestos de mano.
+        
+        Args:
+            frame_skip: Si True, MediaPipe corre solo cada k frames (k
+                adaptativo) y en el resto se predicen los landmarks
+            roi_tracking: Si True, MediaPipe procesa solo un recorte
+                alrededor de la última mano detectada
         """
         # Inicializar componentes
         self.hand_detector = HandDetector(
             max_num_hands=2,
             min_detection_confidence=0.7,
-            min_tracking_confidence=0.5
+            min_tracking_confidence=0.5,
+            # Lado largo en px para MediaPipe, "auto" o vacío (completa)
+            inference_size=os.environ.get('INFERENCE_SIZE'),
+            roi_tracking=roi_tracking
         )
         self.gesture_recognizer = GestureRecognizer()
         self.fps_counter = FPSCounter()
         
+        # Salto de frames (se configura con los FPS de la cámara)
+        self.frame_skip = frame_skip
+        self.frame_skipper = None
+        self.last_gestures = {}  # Gesto por mano de la última inferencia
+        
         # Variables de estado
         self.cap = None
         self.running = False
@@ -65,6 +83,10 @@ class HandGestureApp:
         
         print(f"✅ Cámara inicializada: {width}x{height} @ {fps} FPS")
         
+        if self.frame_skip:
+            self.frame_skipper = AdaptiveFrameSkipper(self.hand_detector, target_fps=fps or 30)
+            print(f"⏭️ Salto de frames adaptativo (objetivo {self.frame_skipper.target_fps:.0f} FPS)")
+        
         # Probar captura de frame
         ret, test_frame = self.cap.read()
         if not ret:
@@ -88,9 +110,10 @@ class HandGestureApp:
         # Voltear horizontalmente para efecto espejo
         frame = cv2.flip(frame, 1)
         
-        # Detectar manos
-        frame, hands_data = self.hand_detector.detect_hands(
-            frame, draw=self.show_landmarks
+        # Detectar manos (el frame volteado es nuestro: dibujar sin copiar)
+        detector = self.frame_skipper or self.hand_detector
+        frame, hands_data = detector.detect_hands(
+            frame, draw=self.show_landmarks, zero_copy=True
         )
         
         hands_info = []
@@ -98,7 +121,14 @@ class HandGestureApp:
         # Procesar cada mano detectada
         for hand_data in hands_data:
             landmarks = hand_data['landmarks']
-            gesture_info = self.gesture_recognizer.get_gesture_info(landmarks)
+            label = hand_data['label']
+            if hand_data.get('predicted') and label in self.last_gestures:
+                # Landmarks predichos: mantener el gesto de la última inferencia
+                gesture_info = self.last_gestures[label]
+            else:
+                # Clasificar con las coordenadas sin redondear
+                gesture_info = self.gesture_recognizer.get_gesture_info(hand_data['points'])
+                self.last_gestures[label] = gesture_info
             
             hand_info = {
                 'landmarks': landmarks,
@@ -119,14 +149,17 @@ class HandGestureApp:
             hands_info: Lista con información de las manos
             fps: FPS actual
         """
-        # Dibujar FPS
+        # Dibujar FPS y tiempo por etapa
         self.fps_counter.draw_fps(frame, fps)
+        self.fps_counter.draw_stage_times(frame)
         
         # Dibujar información de controles
         draw_controls_info(frame)
         
         # Dibujar modo actual
         mode_text = f"Modo: {self.display_modes[self.current_mode]}"
+        if self.frame_skipper:
+            mode_text += f" | Inferencia 1/{self.frame_skipper.skip}"
         cv2.putText(frame, mode_text, (10, frame.shape[0] - 20), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
         
@@ -290,12 +323,14 @@ class HandGestureApp:
         
         return True
     
-    def run(self, camera_id=0):
+    def run(self, camera_id=0, pipelined=False):
         """
         Ejecuta la aplicación principal.
         
         Args:
             camera_id: ID de la cámara a utilizar
+            pipelined: Si True, captura, inferencia y render corren en
+                etapas paralelas (ver run_pipelined)
         """
         # Inicializar cámara
         if not self.initialize_camera(camera_id):
@@ -313,44 +348,135 @@ class HandGestureApp:
         try:
             print("🎬 Iniciando bucle principal de video...")
             print("📺 La ventana debería aparecer ahora...")
-            frame_count = 0
+            if pipelined:
+                self.run_pipelined(window_name)
+            else:
+                self.run_serial(window_name)
+        
+        except KeyboardInterrupt:
+            print("\n⚡ Interrupción por teclado detectada")
+        
+        finally:
+            self.cleanup()
+    
+    def run_serial(self, window_name):
+        """
+        Bucle clásico: leer, procesar y mostrar cada frame en orden.
+        """
+        frame_count = 0
+        
+        while self.running:
+            # Leer frame
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("❌ Error al leer el frame de la cámara")
+                break
+            self.fps_counter.record_stage("captura", time.perf_counter() - start)
             
-            while self.running:
-                # Leer frame
+            frame_count += 1
+            if frame_count == 1:
+                print("✅ Primer frame procesado - ¡La ventana debería estar visible!")
+            elif frame_count % 120 == 0:  # Log cada 4 segundos aprox
+                print(f"📺 Frames procesados: {frame_count}")
+            
+            # Procesar frame
+            start = time.perf_counter()
+            processed_frame, hands_info = self.process_frame(frame)
+            self.fps_counter.record_stage("inferencia", time.perf_counter() - start)
+            
+            if not self.render_frame(window_name, processed_frame, hands_info):
+                break
+    
+    def run_pipelined(self, window_name):
+        """
+        Bucle en tres etapas: un hilo de captura, un hilo de inferencia y el
+        render en el hilo principal (OpenCV solo muestra ventanas desde ahí).
+        
+        Las etapas se comunican con colas de un elemento donde gana el frame
+        más reciente, así la inferencia del frame N se solapa con la captura
+        del N+1 y nunca se acumula retraso.
+        """
+        frames = LatestFrameQueue()
+        results = LatestFrameQueue()
+        stop = threading.Event()
+        
+        def capture_loop():
+            while not stop.is_set():
+                start = time.perf_counter()
                 ret, frame = self.cap.read()
                 if not ret:
                     print("❌ Error al leer el frame de la cámara")
                     break
-                
-                frame_count += 1
-                if frame_count == 1:
-                    print("✅ Primer frame procesado - ¡La ventana debería estar visible!")
-                elif frame_count % 120 == 0:  # Log cada 4 segundos aprox
-                    print(f"📺 Frames procesados: {frame_count}")
-                
-                # Procesar frame
+                self.fps_counter.record_stage("captura", time.perf_counter() - start)
+                frames.put(frame)
+            stop.set()
+        
+        def inference_loop():
+            while not stop.is_set():
+                frame = frames.get(timeout=0.1)
+                if frame is None:
+                    continue
+                start = time.perf_counter()
                 processed_frame, hands_info = self.process_frame(frame)
-                
-                # Actualizar FPS
-                fps = self.fps_counter.update()
-                
-                # Dibujar interfaz
-                self.draw_interface(processed_frame, hands_info, fps)
-                
-                # Mostrar frame
-                cv2.imshow(window_name, processed_frame)
-                
-                # Manejar entrada de teclado
-                key = cv2.waitKey(1) & 0xFF
-                if key != 255:  # Si se presionó alguna tecla
-                    if not self.handle_keyboard_input(key, processed_frame, hands_info):
-                        break
+                self.fps_counter.record_stage("inferencia", time.perf_counter() - start)
+                results.put((processed_frame, hands_info))
         
-        except KeyboardInterrupt:
-            print("\n⚡ Interrupción por teclado detectada")
+        workers = [
+            threading.Thread(target=capture_loop, name="captura", daemon=True),
+            threading.Thread(target=inference_loop, name="inferencia", daemon=True)
+        ]
+        for worker in workers:
+            worker.start()
+        print("🧵 Pipeline iniciado: captura | inferencia | render")
         
+        try:
+            while self.running and not stop.is_set():
+                result = results.get(timeout=0.1)
+                if result is None:
+                    # Mantener la ventana respondiendo mientras llega el frame
+                    cv2.waitKey(1)
+                    continue
+                
+                processed_frame, hands_info = result
+                if not self.render_frame(window_name, processed_frame, hands_info):
+                    break
         finally:
-            self.cleanup()
+            stop.set()
+            frames.close()
+            results.close()
+            for worker in workers:
+                worker.join(timeout=1)
+            print(f"📉 Frames descartados: {frames.dropped} sin procesar, "
+                  f"{results.dropped} sin mostrar")
+    
+    def render_frame(self, window_name, frame, hands_info):
+        """
+        Dibuja la interfaz, muestra el frame y atiende el teclado.
+        
+        Returns:
+            continue_running: False si el usuario pidió salir
+        """
+        start = time.perf_counter()
+        
+        # Actualizar FPS
+        fps = self.fps_counter.update()
+        if self.frame_skipper:
+            self.frame_skipper.adapt(fps)
+        
+        # Dibujar interfaz
+        self.draw_interface(frame, hands_info, fps)
+        
+        # Mostrar frame
+        cv2.imshow(window_name, frame)
+        
+        # Manejar entrada de teclado
+        key = cv2.waitKey(1) & 0xFF
+        self.fps_counter.record_stage("render", time.perf_counter() - start)
+        if key != 255:  # Si se presionó alguna tecla
+            return self.handle_keyboard_input(key, frame, hands_info)
+        
+        return True
     
     def cleanup(self):
         """
@@ -359,6 +485,14 @@ class HandGestureApp:
         if self.cap:
             self.cap.release()
         cv2.destroyAllWindows()
+        
+        if self.hand_detector.roi_tracking:
+            stats = self.hand_detector.roi_stats
+            frames = stats['roi_frames'] + stats['full_frames']
+            if frames:
+                print(f"🎯 ROI: {stats['roi_frames']} frames con recorte, "
+                      f"{stats['full_frames']} completos, {stats['lost']} pérdidas, "
+                      f"{stats['pixels'] // frames} píxeles/frame")
         print("🧹 Recursos liberados. ¡Hasta luego!")
 
 
@@ -366,11 +500,23 @@ def main():
     """
     Función principal de la aplicación.
     """
+    parser = argparse.ArgumentParser(description="Hand Gesture Recognition App")
+    parser.add_argument('--camera', type=int, default=0, help="ID de la cámara")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Captura, inferencia y render en hilos separados")
+    parser.add_argument('--skip-frames', action='store_true',
+                        help="Inferir cada k frames (k adaptativo) y predecir el resto")
+    parser.add_argument('--roi', action='store_true',
+                        help="Procesar solo un recorte alrededor de la mano seguida "
+                             "(menos píxeles por frame, pero cada recorte se detecta desde "
+                             "cero: la latencia no baja)")
+    args = parser.parse_args()
+    
     print("🖐️ Iniciando Hand Gesture Recognition App...")
     print("=" * 50)
     
-    app = HandGestureApp()
-    app.run(camera_id=0)
+    app = HandGestureApp(frame_skip=args.skip_frames, roi_tracking=args.roi)
+    app.run(camera_id=args.camera, pipelined=args.pipeline)
 
 
 if __name__ == "__main__":
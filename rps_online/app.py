@@ -1,33 +1,30 @@
-from flask import Flask, render_template, request
+from flask import Flask, render_template, request, jsonify, abort, make_response
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
-import base64
-import io
 import time
 import uuid
 from threading import Lock
 import random
+import importlib.util
 import os
+import sys
+from urllib.parse import quote
 
-# Import OpenCV with error handling for deployment
-try:
-    import cv2
-    import numpy as np
-    CV2_AVAILABLE = True
-    print("✅ OpenCV loaded successfully")
-except ImportError as e:
-    print(f"⚠️ OpenCV import error: {e}")
-    CV2_AVAILABLE = False
-    
-from PIL import Image
-
-# Import gesture detector with error handling
-try:
-    from gesture_detector import GestureDetector
-    GESTURE_DETECTOR_AVAILABLE = True
-    print("✅ GestureDetector loaded successfully")
-except ImportError as e:
-    print(f"⚠️ GestureDetector import error: {e}")
-    GESTURE_DETECTOR_AVAILABLE = False
+# Permitir los imports locales (gesture_detector, ...) también desde server.py,
+# y los módulos compartidos con la app de escritorio (gesture_core, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inference_service import InferenceService, InferenceQueueFull
+from frame_codec import capture_bytes, decode_image, parse_landmarks
+from detector_pool import DetectorPool, DetectorPoolTimeout
+from vision_loader import VisionLoader
+from gesture_cache import GestureCache, capture_key
+from capture_store import CaptureStore, make_thumbnail
+from room_registry import RoomRegistry
+from timed_lock import TimedLock
+from round_scheduler import RoundScheduler
+from room_ids import RoomIdAllocator, worker_id
+from state_store import open_store, store_url
 
 # Configuración de la aplicación
 app = Flask(__name__)
@@ -35,7 +32,9 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'rps_online_secret_2025'
 
 # Configuración de CORS para desarrollo y producción
 cors_origins = os.environ.get('CORS_ORIGINS', "*")
-socketio = SocketIO(app, cors_allowed_origins=cors_origins)
+# Con varios procesos, los emits pasan por una cola compartida (p. ej. redis://...)
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE') or None
+socketio = SocketIO(app, cors_allowed_origins=cors_origins, message_queue=SOCKETIO_MESSAGE_QUEUE)
 
 class GameRoom:
     def __init__(self, room_id):
@@ -44,19 +43,26 @@ class GameRoom:
         self.status = 'waiting'  # waiting, countdown, playing, results
         self.countdown_timer = None
         self.gestures = {}
-        self.captures = {}
+        self.round = 1
         self.results = None
         self.created_at = time.time()
+        self.last_activity = self.created_at
+        # Jugadores que no enviaron su gesto a tiempo en esta ronda
+        self.forfeits = []
+        self.capture_timer = None
         self.is_ai_game = False
         self.ai_player = None
+        # Serializa los cambios de esta sala; salas distintas no compiten.
+        # Reentrante: determine_winner y start_countdown se llaman con él tomado
+        self.lock = TimedLock(reentrant=True)
     
     def add_player(self, player_id, username):
-        if len(self.players) < 2:
+        # Una sala vaciada ya salió del registro: no se puede volver a usar
+        if len(self.players) < 2 and self.status != 'empty':
             self.players[player_id] = {
                 'username': username,
                 'ready': False,
-                'gesture': None,
-                'capture': None
+                'gesture': None
             }
             return True
         return False
@@ -81,12 +87,12 @@ class GameRoom:
     def reset_round(self):
         self.status = 'waiting'
         self.gestures = {}
-        self.captures = {}
+        self.round += 1
+        self.forfeits = []
         self.results = None
         for player in self.players.values():
             player['ready'] = False
             player['gesture'] = None
-            player['capture'] = None
         
         # Reset IA si existe
         if self.is_ai_game and self.ai_player:
@@ -112,17 +118,166 @@ class AIPlayer:
 
 
 # Estado global del juego
-game_rooms = {}
+game_rooms = RoomRegistry()
 players = {}
-room_lock = Lock()
 
-# Initialize gesture detector if available
-if GESTURE_DETECTOR_AVAILABLE and CV2_AVAILABLE:
-    gesture_detector = GestureDetector()
-    print("✅ GestureDetector initialized")
-else:
-    gesture_detector = None
-    print("⚠️ GestureDetector not available, using fallback")
+# Nombre de este worker, que va en los IDs de sus salas (vacío con un solo
+# proceso). Cada sala vive en el worker que la creó
+WORKER_ID = worker_id(os.environ.get('WORKER_ID'), shared=bool(SOCKETIO_MESSAGE_QUEUE))
+if SOCKETIO_MESSAGE_QUEUE and not os.environ.get('WORKER_ID'):
+    print(f"⚠️ WORKER_ID no definido, usando {WORKER_ID} (el proxy no podrá enrutar por worker)")
+# Dueños de las salas y listas del lobby compartidas entre workers
+state_store = open_store(store_url(os.environ.get('STATE_STORE_URL'), SOCKETIO_MESSAGE_QUEUE))
+
+# IDs de sala únicos (contador en base 36 + sufijo aleatorio), reservados en
+# el almacén; si otro worker ya tiene uno, se prueba con el siguiente. Con
+# varios workers el ID lleva el número de arranque: un worker reiniciado con
+# el mismo nombre no repite los IDs de antes
+ROOM_ID_CLAIM_ATTEMPTS = 3
+room_ids = RoomIdAllocator(
+    suffix_length=int(os.environ.get('ROOM_ID_SUFFIX_LENGTH', 6)),
+    worker=WORKER_ID,
+    epoch=state_store.next_epoch(WORKER_ID) if WORKER_ID else None
+)
+
+# Socket.IO room con los clientes que están en el lobby
+LOBBY_ROOM = 'lobby'
+# Ventana (segundos) en la que se combinan los cambios de salas en un solo envío
+LOBBY_UPDATE_INTERVAL = float(os.environ.get('LOBBY_UPDATE_INTERVAL', 0.25))
+lobby_update_scheduled = False
+lobby_update_lock = Lock()
+
+# Cuenta atrás de cada ronda, avanzada por un único planificador
+COUNTDOWN_STEPS = [3, 2, 1, 'GO!']
+COUNTDOWN_INTERVAL = float(os.environ.get('COUNTDOWN_INTERVAL', 1))
+round_scheduler = RoundScheduler(socketio, tick=float(os.environ.get('SCHEDULER_TICK', 0.05)))
+
+# Segundos para enviar el gesto tras capture_gesture; después pierde quien falte
+CAPTURE_TIMEOUT = float(os.environ.get('CAPTURE_TIMEOUT', 10))
+# Salas abandonadas: sin actividad o demasiado viejas, revisadas cada REAPER_INTERVAL
+ROOM_IDLE_TIMEOUT = float(os.environ.get('ROOM_IDLE_TIMEOUT', 10 * 60))
+ROOM_MAX_AGE = float(os.environ.get('ROOM_MAX_AGE', 4 * 60 * 60))
+REAPER_INTERVAL = float(os.environ.get('REAPER_INTERVAL', 30))
+reaper_started = False
+reaped_rooms = 0
+reaper_lock = Lock()
+# La lista del lobby de este worker se republica en cada pasada del reaper;
+# si el worker cae, caduca y sus salas desaparecen del lobby de los demás.
+# Las reservas de sus salas se renuevan igual: al caer, dejan de existir
+LOBBY_STATE_TTL = 3 * REAPER_INTERVAL
+ROOM_CLAIM_TTL = 3 * REAPER_INTERVAL
+
+# Pool de procesos de inferencia (INFERENCE_WORKERS=0 usa el pool de detectores local)
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 2))
+INFERENCE_MAX_PENDING = int(os.environ.get('INFERENCE_MAX_PENDING', 32))
+INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', 10))
+
+# Tamaño máximo de la miniatura que acompaña a gesture_landmarks (y de una
+# captura que se guarda tal cual cuando no hay visión para reducirla)
+LANDMARK_THUMBNAIL_MAX_BYTES = int(os.environ.get('LANDMARK_THUMBNAIL_MAX_BYTES', 32 * 1024))
+
+# Detectores en este proceso (sin pool de procesos); cada handler toma uno
+DETECTOR_POOL_SIZE = int(os.environ.get('DETECTOR_POOL_SIZE', 2))
+
+# Miniaturas de las capturas: lado largo, calidad JPEG y memoria máxima por sala
+capture_store = CaptureStore(
+    thumbnail_size=int(os.environ.get('CAPTURE_THUMBNAIL_SIZE', 240)),
+    quality=int(os.environ.get('CAPTURE_THUMBNAIL_QUALITY', 70)),
+    room_budget=int(os.environ.get('CAPTURE_ROOM_BUDGET', 256 * 1024))
+)
+# Segundos que el navegador/CDN puede reutilizar una miniatura sin revalidar
+CAPTURE_CACHE_MAX_AGE = int(os.environ.get('CAPTURE_CACHE_MAX_AGE', 300))
+
+# Caché de gestos por contenido de la captura (GESTURE_CACHE_SIZE=0 la desactiva)
+gesture_cache = GestureCache(
+    max_entries=int(os.environ.get('GESTURE_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('GESTURE_CACHE_TTL', 60))
+)
+
+inference_service = None
+inference_service_lock = Lock()
+detector_pool = None
+detector_pool_lock = Lock()
+
+# Clasificar landmarks enviados por el navegador no necesita MediaPipe
+landmark_classifier = None
+landmark_classifier_lock = Lock()
+
+# Carga del stack de visión: "background" (al arrancar el servidor, sin
+# bloquearlo), "eager" (al arrancar, esperando a que termine) o "lazy"
+# (con la primera captura)
+VISION_LOAD = os.environ.get('VISION_LOAD', 'background')
+INFERENCE_WARM_UP_TIMEOUT = float(os.environ.get('INFERENCE_WARM_UP_TIMEOUT', 60))
+
+def get_landmark_classifier():
+    """Devuelve el clasificador de landmarks, importándolo al primer uso"""
+    global landmark_classifier
+    with landmark_classifier_lock:
+        if landmark_classifier is None:
+            try:
+                from gesture_core import GestureClassifier
+                landmark_classifier = GestureClassifier(os.environ.get('GESTURE_PROFILE', 'online'))
+            except ImportError as e:
+                print(f"⚠️ GestureClassifier import error: {e}")
+                landmark_classifier = False
+    return landmark_classifier or None
+
+def get_inference_service():
+    """Devuelve el servicio de inferencia si la visión ya cargó con procesos worker"""
+    return inference_service if vision.ready else None
+
+def get_detector_pool():
+    """Devuelve el pool de detectores locales si la visión ya cargó sin procesos worker"""
+    return detector_pool if vision.ready else None
+
+def load_vision():
+    """Importa OpenCV/MediaPipe y arranca y calienta la inferencia (tarda ~1 s)"""
+    global inference_service, detector_pool
+    if INFERENCE_WORKERS > 0:
+        # MediaPipe se importa en los procesos worker; aquí solo se comprueba que exista
+        for module in ('cv2', 'mediapipe'):
+            if importlib.util.find_spec(module) is None:
+                raise ImportError(f"No module named '{module}'")
+        service = InferenceService(workers=INFERENCE_WORKERS, max_pending=INFERENCE_MAX_PENDING)
+        service.start()
+        if not service.wait_ready(timeout=INFERENCE_WARM_UP_TIMEOUT):
+            service.shutdown()
+            raise RuntimeError(f"Los procesos de inferencia no arrancaron en {INFERENCE_WARM_UP_TIMEOUT}s")
+        with inference_service_lock:
+            inference_service = service
+        print(f"✅ InferenceService iniciado con {INFERENCE_WORKERS} procesos")
+    else:
+        from gesture_detector import GestureDetector
+        pool = DetectorPool(
+            lambda: GestureDetector(batch_workers=1),
+            size=DETECTOR_POOL_SIZE,
+            warm_up=lambda detector: detector.warm_up()
+        )
+        pool.start()
+        with detector_pool_lock:
+            detector_pool = pool
+        print(f"✅ DetectorPool listo: {DETECTOR_POOL_SIZE} detectores "
+              f"calentados en {pool.warm_up_ms:.0f} ms")
+
+vision = VisionLoader(load_vision)
+
+def start_inference():
+    """Empieza a cargar la visión al iniciar el servidor"""
+    if VISION_LOAD == 'background':
+        # Se aceptan conexiones mientras tanto; /health indica cuándo está lista
+        vision.start(background=True)
+    elif VISION_LOAD == 'eager':
+        vision.start(background=False)
+
+def wait_for_result(future, timeout=INFERENCE_TIMEOUT):
+    """Espera un Future cediendo el control al loop de Socket.IO"""
+    deadline = time.time() + timeout
+    while not future.done():
+        if time.time() > deadline:
+            future.cancel()
+            raise TimeoutError(f"Inferencia sin respuesta tras {timeout}s")
+        socketio.sleep(0.01)
+    return future.result()
 
 @app.route('/')
 def index():
@@ -202,6 +357,50 @@ def test_page():
 def game(room_id):
     return render_template('game.html', room_id=room_id)
 
+@app.route('/capture/<room_id>/<int:round_number>/<player_id>')
+def capture(room_id, round_number, player_id):
+    """Miniatura de una captura, cacheable por el navegador o un CDN"""
+    stored = capture_store.get(room_id, round_number, player_id)
+    if stored is None:
+        abort(404)
+    
+    response = make_response(stored.data)
+    response.mimetype = 'image/jpeg'
+    response.set_etag(stored.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CAPTURE_CACHE_MAX_AGE
+    # If-None-Match con el mismo ETag responde 304 sin cuerpo
+    return response.make_conditional(request)
+
+@app.route('/stats')
+def stats():
+    service = inference_service
+    pool = detector_pool
+    return jsonify({
+        'rooms': len(game_rooms),
+        'room_registry': game_rooms.stats(),
+        'scheduler': round_scheduler.stats(),
+        'worker': WORKER_ID,
+        'state_store': state_store.stats(),
+        'room_ids': room_ids.stats(),
+        'reaped_rooms': reaped_rooms,
+        'players': len(players),
+        'vision': vision.status(),
+        'inference': service.stats() if service else None,
+        'detector_pool': pool.stats() if pool else None,
+        'gesture_cache': gesture_cache.stats(),
+        'captures': capture_store.stats()
+    })
+
+@app.route('/health')
+def health():
+    # Responde aunque la visión no haya terminado de cargar
+    return jsonify({
+        'status': 'ok',
+        'vision_ready': vision.ready,
+        'vision_state': vision.state
+    })
+
 @socketio.on('join_lobby')
 def handle_join_lobby(data):
     print(f"Usuario intentando unirse al lobby: {data}")
@@ -213,11 +412,11 @@ def handle_join_lobby(data):
         if existing_player['username'] == username:
             print(f"Jugador {username} ya conectado, enviando datos existentes")
             # Enviar datos existentes sin crear nuevo jugador
-            available_rooms = get_available_rooms()
+            join_room(LOBBY_ROOM)
             emit('lobby_joined', {
                 'player_id': existing_player['id'],
                 'username': username,
-                'available_rooms': available_rooms
+                **lobby_state()
             })
             return
     
@@ -231,17 +430,23 @@ def handle_join_lobby(data):
     
     print(f"Jugador {username} agregado con ID {player_id}")
     
-    # Enviar lista de salas disponibles
-    available_rooms = get_available_rooms()
+    # Recibir las novedades del lobby y la lista de salas disponibles
+    join_room(LOBBY_ROOM)
+    state = lobby_state()
     
-    print(f"Enviando lobby_joined para {username}, salas: {available_rooms}")
+    print(f"Enviando lobby_joined para {username}, salas: {state['available_rooms']}")
     
     emit('lobby_joined', {
         'player_id': player_id,
         'username': username,
-        'available_rooms': available_rooms
+        **state
     })
 
+@socketio.on('get_rooms')
+def handle_get_rooms():
+    """Lista completa de salas (botón de refrescar o hueco en las diferencias)"""
+    emit('room_list_updated', lobby_state())
+
 @socketio.on('create_room')
 def handle_create_room():
     print(f"🏠 HANDLER create_room ejecutado - SID: {request.sid}")
@@ -252,27 +457,23 @@ def handle_create_room():
         emit('error', {'message': 'Usuario no registrado, recarga la página'})
         return
     
-    room_id = f"room_{int(time.time() * 1000) % 10000}"
+    room_id = create_room_id('room')
+    if room_id is None:
+        return
     player = players[request.sid]
     
-    with room_lock:
-        if room_id not in game_rooms:
-            game_rooms[room_id] = GameRoom(room_id)
-        
-        room = game_rooms[room_id]
+    room = register_room(GameRoom(room_id))
+    with room.lock:
         if room.add_player(player['id'], player['username']):
             player['room'] = room_id
+            game_rooms.refresh(room_id)
             join_room(room_id)
+            leave_room(LOBBY_ROOM)
             
             emit('room_created', {
                 'room_id': room_id,
                 'redirect': True
             })
-            
-            # Notificar a todos sobre la nueva sala
-            socketio.emit('room_list_updated', {
-                'available_rooms': get_available_rooms()
-            })
 
 @socketio.on('create_ai_game')
 def handle_create_ai_game():
@@ -284,20 +485,22 @@ def handle_create_ai_game():
         emit('error', {'message': 'Usuario no registrado, recarga la página'})
         return
     
-    room_id = f"ai_{int(time.time() * 1000) % 10000}"
+    room_id = create_room_id('ai')
+    if room_id is None:
+        return
     player = players[request.sid]
     
-    with room_lock:
-        if room_id not in game_rooms:
-            game_rooms[room_id] = GameRoom(room_id)
-        
-        room = game_rooms[room_id]
-        room.is_ai_game = True
-        room.ai_player = AIPlayer()
-        
+    # Marcar la sala como AI antes de registrarla, así nunca aparece en el lobby
+    new_room = GameRoom(room_id)
+    new_room.is_ai_game = True
+    new_room.ai_player = AIPlayer()
+    room = register_room(new_room)
+    
+    with room.lock:
         if room.add_player(player['id'], player['username']):
             player['room'] = room_id
             join_room(room_id)
+            leave_room(LOBBY_ROOM)
             
             # Marcar sala como lista inmediatamente
             room.status = 'ready'
@@ -324,12 +527,25 @@ def handle_join_room_request(data):
     room_id = data['room_id']
     player = players[request.sid]
     
-    with room_lock:
-        if room_id in game_rooms:
-            room = game_rooms[room_id]
+    room = game_rooms.get(room_id)
+    if room is None:
+        owner = state_store.room_owner(room_id)
+        if owner is not None and owner != WORKER_ID:
+            # La sala vive en otro worker: el cliente entra desde la página
+            # del juego, cuya conexión se enruta al dueño por el ID de la sala
+            emit('room_joined', {
+                'room_id': room_id,
+                'redirect': True,
+                'worker': owner
+            })
+    else:
+        with room.lock:
             if room.add_player(player['id'], player['username']):
                 player['room'] = room_id
+                game_rooms.refresh(room_id)
+                game_rooms.touch(room_id)
                 join_room(room_id)
+                leave_room(LOBBY_ROOM)
                 
                 emit('room_joined', {
                     'room_id': room_id,
@@ -351,11 +567,6 @@ def handle_join_room_request(data):
                     socketio.emit('room_full', {
                         'players': [p['username'] for p in room.players.values()]
                     }, room=room_id)
-                    
-                    # Actualizar lista de salas
-                    socketio.emit('room_list_updated', {
-                        'available_rooms': get_available_rooms()
-                    })
             else:
                 emit('join_failed', {'reason': 'Sala llena'})
 
@@ -367,9 +578,13 @@ def handle_player_ready(data):
     player = players[request.sid]
     room_id = player.get('room')
     
-    if room_id and room_id in game_rooms:
-        room = game_rooms[room_id]
+    room = game_rooms.get(room_id) if room_id else None
+    if room is None:
+        return
+    
+    with room.lock:
         if player['id'] in room.players:
+            game_rooms.touch(room_id)
             room.players[player['id']]['ready'] = True
             
             print(f"✅ Jugador {player['username']} listo en sala {room_id}")
@@ -383,25 +598,79 @@ def handle_player_ready(data):
                 print(f"⏳ Esperando más jugadores en sala {room_id}")
                 
 def start_countdown(room_id):
-    room = game_rooms[room_id]
-    room.status = 'countdown'
+    room = game_rooms.get(room_id)
+    if room is None:
+        return
+    
+    with room.lock:
+        # Solo arranca desde la espera: los dos jugadores pueden marcarse
+        # listos a la vez (una sola cuenta) y las marcas de listo siguen
+        # activas durante la captura y los resultados hasta reset_round
+        if room.status not in ('waiting', 'ready'):
+            return
+        room.status = 'countdown'
+        round_number = room.round
     
     print(f"⏰ Iniciando countdown en sala {room_id}")
     
-    def countdown_sequence():
-        for i in range(3, 0, -1):
-            socketio.emit('countdown', {'count': i}, room=room_id)
-            socketio.sleep(1)
+    # El planificador central avanza la cuenta; no hay una tarea por sala
+    round_scheduler.schedule(0, countdown_step, room_id, round_number, 0)
+
+def countdown_step(room_id, round_number, step):
+    """Un paso de la cuenta atrás (3, 2, 1, GO!, captura); devuelve los emits"""
+    room = game_rooms.get(room_id)
+    if room is None:
+        return []
+    
+    with room.lock:
+        # La ronda cambió o se cerró mientras tanto
+        if room.round != round_number or room.status != 'countdown':
+            return []
         
-        # ¡YA!
-        socketio.emit('countdown', {'count': 'GO!'}, room=room_id)
-        socketio.sleep(1)
+        if step < len(COUNTDOWN_STEPS):
+            round_scheduler.schedule(COUNTDOWN_INTERVAL, countdown_step, room_id, round_number, step + 1)
+            return [('countdown', {'count': COUNTDOWN_STEPS[step]}, room_id)]
         
-        # Capturar gestos
+        # Capturar gestos, con tiempo límite
         room.status = 'capture'
-        socketio.emit('capture_gesture', {}, room=room_id)
+        room.capture_timer = round_scheduler.schedule(
+            CAPTURE_TIMEOUT, capture_deadline, room_id, round_number
+        )
+        # El cliente devuelve la ronda con su captura (ver accepts_capture)
+        return [('capture_gesture', {'round': round_number}, room_id)]
+
+def capture_deadline(room_id, round_number):
+    """Vence el tiempo de captura: quien no envió su gesto pierde la ronda"""
+    room = game_rooms.get(room_id)
+    if room is None:
+        return []
     
-    socketio.start_background_task(countdown_sequence)
+    with room.lock:
+        room.capture_timer = None
+        if room.round != round_number or room.status != 'capture':
+            return []
+        
+        missing = [player_id for player_id in room.players if player_id not in room.gestures]
+        print(f"⏱️ Tiempo de captura vencido en sala {room_id}: {len(missing)} sin gesto")
+        room.forfeits = missing
+        for player_id in missing:
+            room.gestures[player_id] = 'unknown'
+            room.players[player_id]['gesture'] = 'unknown'
+        
+        if room.is_ai_game and 'ai' not in room.gestures:
+            room.gestures['ai'] = room.ai_player.make_move()
+        
+        determine_winner(room_id)
+        if room.status == 'results':
+            return []
+        
+        # Falta un jugador (se fue durante la ronda): volver a esperar
+        room.reset_round()
+        return [('round_reset', {
+            'is_ai_game': room.is_ai_game,
+            'status': room.status,
+            'auto_start': False
+        }, room_id)]
 
 @socketio.on('gesture_capture')
 def handle_gesture_capture(data):
@@ -411,33 +680,148 @@ def handle_gesture_capture(data):
     player = players[request.sid]
     room_id = player.get('room')
     
-    if room_id and room_id in game_rooms:
-        room = game_rooms[room_id]
+    room = game_rooms.get(room_id) if room_id else None
+    # Una captura tardía o de otra ronda ni siquiera se procesa
+    if room is not None and accepts_capture(room, data.get('round'), player):
+        # Bytes del JPEG: adjunto binario o data URL (clientes antiguos)
+        image_bytes = capture_bytes(data['image'])
         
-        # Decodificar imagen
-        image_data = data['image'].split(',')[1]
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
+        # Sin el lock de la sala: la inferencia es lo más lento de la ronda
+        gesture, thumbnail = detect_capture_gesture(image_bytes)
         
-        # Detectar gesto con fallback
-        if gesture_detector and CV2_AVAILABLE:
-            try:
-                # Convertir a formato OpenCV
-                opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                gesture = gesture_detector.detect_rps_gesture(opencv_image)
-            except Exception as e:
-                print(f"Error en detección de gesto: {e}")
-                gesture = random.choice(['rock', 'paper', 'scissors'])  # Fallback
+        register_gesture(room_id, player, data.get('round'), gesture, thumbnail, len(image_bytes))
+
+def accepts_capture(room, round_number, player):
+    """
+    Si la sala espera el gesto de este jugador para esa ronda: solo durante
+    la captura y con el número de ronda de capture_gesture. Así un reintento
+    de la ronda anterior que llega después de play_again no cuenta.
+    
+    Los clientes antiguos no envían la ronda: durante la captura su gesto
+    cuenta para la ronda actual
+    """
+    if room.status == 'capture' and round_number in (None, room.round):
+        return True
+    print(f"⚠️ Captura de {player['username']} descartada (ronda {round_number}, "
+          f"sala en ronda {room.round}, estado {room.status})")
+    return False
+
+def detect_capture_gesture(image_bytes):
+    """
+    Detecta el gesto de una captura JPEG y arma su miniatura, con caché y
+    fallback aleatorio. Devuelve (gesto, miniatura)
+    """
+    # Una captura repetida (reintento, reconexión) no se vuelve a procesar
+    key = capture_key(image_bytes)
+    cached = gesture_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    gesture = None
+    # Sin visión no se decodifica: solo se conserva una captura ya pequeña
+    thumbnail = image_bytes if len(image_bytes) <= LANDMARK_THUMBNAIL_MAX_BYTES else b''
+    
+    # La primera captura arranca la carga de la visión si todavía no empezó;
+    # la espera cede el loop, así que las demás salas no se congelan
+    vision.ensure_ready(timeout=INFERENCE_TIMEOUT, sleep=socketio.sleep)
+    service = get_inference_service()
+    pool = get_detector_pool()
+    if service:
+        try:
+            # Decodificación, inferencia y miniatura fuera del loop de Socket.IO
+            gesture, thumbnail = wait_for_result(service.submit(
+                image_bytes,
+                thumbnail_size=capture_store.thumbnail_size,
+                thumbnail_quality=capture_store.quality
+            ))
+        except InferenceQueueFull as e:
+            print(f"⚠️ Backpressure de inferencia: {e}")
+        except Exception as e:
+            print(f"Error en detección de gesto: {e}")
+    elif pool:
+        try:
+            # Decodificar directamente a BGR
+            opencv_image = decode_image(image_bytes)
+            # Cada handler usa su propio detector (Hands no es thread-safe)
+            with pool.checkout(timeout=INFERENCE_TIMEOUT) as detector:
+                gesture = detector.detect_rps_gesture(opencv_image)
+            # La miniatura sale de la imagen ya decodificada
+            thumbnail = make_thumbnail(image_bytes, capture_store.thumbnail_size,
+                                       capture_store.quality, image=opencv_image)
+        except DetectorPoolTimeout as e:
+            print(f"⚠️ Pool de detectores ocupado: {e}")
+        except Exception as e:
+            print(f"Error en detección de gesto: {e}")
+    else:
+        print("⚠️ Usando gesto aleatorio (detector no disponible)")
+    
+    if gesture is None:
+        # Fallback: gesto aleatorio (no se guarda en la caché)
+        return random.choice(['rock', 'paper', 'scissors']), thumbnail
+    
+    # La miniatura se guarda junto al gesto: una captura repetida no se decodifica
+    gesture_cache.put(key, (gesture, thumbnail))
+    return gesture, thumbnail
+
+@socketio.on('gesture_landmarks')
+def handle_gesture_landmarks(data):
+    """Modo landmarks: el navegador detecta la mano y solo envía los 21 puntos"""
+    if request.sid not in players:
+        return
+    
+    player = players[request.sid]
+    room_id = player.get('room')
+    
+    room = game_rooms.get(room_id) if room_id else None
+    if room is not None and accepts_capture(room, data.get('round'), player):
+        try:
+            landmarks = parse_landmarks(
+                data.get('landmarks'),
+                width=data.get('width', 640),
+                height=data.get('height', 480),
+                normalized=data.get('normalized', False)
+            )
+        except ValueError as e:
+            # Sin mano detectada o datos inválidos
+            print(f"⚠️ Landmarks inválidos de {player['username']}: {e}")
+            landmarks = None
+        
+        if landmarks is None:
+            gesture = 'unknown'
+        elif get_landmark_classifier():
+            gesture = landmark_classifier.classify(landmarks)
         else:
-            # Fallback: gesto aleatorio si no hay detector
             gesture = random.choice(['rock', 'paper', 'scissors'])
             print("⚠️ Usando gesto aleatorio (detector no disponible)")
         
-        # Guardar captura y gesto
-        room.captures[player['id']] = image_data
+        # Miniatura opcional para la pantalla de resultados; el navegador ya la
+        # manda reducida, así que se guarda tal cual
+        thumbnail_bytes = b''
+        thumbnail = data.get('thumbnail')
+        if thumbnail:
+            thumbnail_bytes = capture_bytes(thumbnail)
+            if len(thumbnail_bytes) > LANDMARK_THUMBNAIL_MAX_BYTES:
+                thumbnail_bytes = b''
+        
+        register_gesture(room_id, player, data.get('round'), gesture, thumbnail_bytes)
+
+def register_gesture(room_id, player, round_number, gesture, thumbnail, original_size=None):
+    """Guarda el gesto de un jugador y resuelve la ronda si ya están todos"""
+    room = game_rooms.get(room_id)
+    if room is None:
+        return
+    
+    with room.lock:
+        # Se vuelve a comprobar con el lock: la ronda pudo resolverse (p. ej.
+        # por tiempo) o reiniciarse mientras se detectaba el gesto
+        if player['id'] not in room.players or not accepts_capture(room, round_number, player):
+            return
+        
+        # Solo se guarda la miniatura de un gesto aceptado (ya viene armada)
+        capture_store.put(room_id, room.round, player['id'], thumbnail, original_size)
+        game_rooms.touch(room_id)
         room.gestures[player['id']] = gesture
         room.players[player['id']]['gesture'] = gesture
-        room.players[player['id']]['capture'] = image_data
         
         # Si es juego vs IA, hacer que la IA juegue automáticamente
         if room.is_ai_game and 'ai' not in room.gestures:
@@ -445,13 +829,25 @@ def handle_gesture_capture(data):
             room.gestures['ai'] = ai_gesture
             print(f'🤖 IA jugó: {ai_gesture}')
         
-        # Verificar si todos han enviado su gesto
+        # Verificar si todos han enviado su gesto (una sola vez por ronda)
         expected_gestures = 2 if not room.is_ai_game else 2
         if len(room.gestures) >= expected_gestures:
             determine_winner(room_id)
 
+def capture_url(room, player_id):
+    """URL de la miniatura de un jugador en la ronda actual ('' si no hay)"""
+    capture = capture_store.get(room.room_id, room.round, player_id)
+    if capture is None:
+        return ''
+    # La versión cambia si el jugador reenvía la captura en la misma ronda
+    return (f"/capture/{quote(room.room_id, safe='')}/{room.round}/"
+            f"{quote(player_id, safe='')}?v={capture.etag}")
+
 def determine_winner(room_id):
+    # Se llama desde register_gesture o capture_deadline con room.lock tomado
     room = game_rooms[room_id]
+    round_scheduler.cancel(room.capture_timer)
+    room.capture_timer = None
     
     if room.is_ai_game:
         # Juego vs IA
@@ -479,9 +875,19 @@ def determine_winner(room_id):
         p1_name = room.players[p1_id]['username']
         p2_name = room.players[p2_id]['username']
     
-    # Lógica RPS
+    # Lógica RPS (antes, quien no envió su gesto a tiempo pierde)
     winner = None
-    if p1_gesture == p2_gesture:
+    p1_forfeit = p1_id in room.forfeits
+    p2_forfeit = p2_id in room.forfeits
+    if p1_forfeit and p2_forfeit:
+        result = "Nadie envió su gesto a tiempo"
+    elif p1_forfeit:
+        winner = p2_name
+        result = f"¡{p2_name} gana! ({p1_name} no envió su gesto)"
+    elif p2_forfeit:
+        winner = p1_name
+        result = f"¡{p1_name} gana! ({p2_name} no envió su gesto)"
+    elif p1_gesture == p2_gesture:
         result = "¡Empate!"
     elif (p1_gesture == 'rock' and p2_gesture == 'scissors') or \
          (p1_gesture == 'paper' and p2_gesture == 'rock') or \
@@ -503,14 +909,17 @@ def determine_winner(room_id):
             p1_id: {
                 'username': p1_name,
                 'gesture': p1_gesture,
-                'capture': room.captures.get(p1_id, '')
+                'capture_url': capture_url(room, p1_id),
+                'forfeit': p1_forfeit
             },
             p2_id: {
                 'username': p2_name,
                 'gesture': p2_gesture,
-                'capture': room.captures.get(p2_id, '') if p2_id != 'ai' else ''
+                'capture_url': capture_url(room, p2_id) if p2_id != 'ai' else '',
+                'forfeit': p2_forfeit
             }
-        }
+        },
+        'round': room.round
     }
     
     room.status = 'results'
@@ -530,31 +939,35 @@ def handle_play_again():
     room_id = player.get('room')
     print(f"🏠 Jugador {player['username']} en sala {room_id}")
     
-    if room_id and room_id in game_rooms:
-        room = game_rooms[room_id]
+    room = game_rooms.get(room_id) if room_id else None
+    if room is not None:
         print(f"🎮 Sala encontrada. Es AI: {room.is_ai_game}")
         
-        room.reset_round()
-        print(f"🔄 Ronda reseteada")
-        
-        # Para juegos AI, automatizar el flujo completo
-        if room.is_ai_game:
-            room.status = 'ready'
-            print(f"🤖 Sala AI {room_id} marcada como lista")
-            
-            # Marcar automáticamente al jugador como listo
-            room.players[player['id']]['ready'] = True
-            print(f"🚀 Jugador automáticamente marcado como listo")
+        with room.lock:
+            game_rooms.touch(room_id)
+            # Si los dos jugadores piden revancha a la vez, se resetea una sola vez
+            if room.status == 'results':
+                room.reset_round()
+                print(f"🔄 Ronda reseteada")
+                
+                # Para juegos AI, automatizar el flujo completo
+                if room.is_ai_game and player['id'] in room.players:
+                    room.status = 'ready'
+                    print(f"🤖 Sala AI {room_id} marcada como lista")
+                    
+                    # Marcar automáticamente al jugador como listo
+                    room.players[player['id']]['ready'] = True
+                    print(f"🚀 Jugador automáticamente marcado como listo")
+                    
+                    # Iniciar countdown inmediatamente
+                    print(f"⏰ Iniciando countdown automático para AI")
+                    start_countdown(room_id)
             
-            # Iniciar countdown inmediatamente
-            print(f"⏰ Iniciando countdown automático para AI")
-            start_countdown(room_id)
-        
-        reset_data = {
-            'is_ai_game': room.is_ai_game,
-            'status': room.status,
-            'auto_start': room.is_ai_game  # Indicar al frontend que se auto-inicia
-        }
+            reset_data = {
+                'is_ai_game': room.is_ai_game,
+                'status': room.status,
+                'auto_start': room.is_ai_game  # Indicar al frontend que se auto-inicia
+            }
         print(f"📡 Enviando round_reset: {reset_data}")
         
         socketio.emit('round_reset', reset_data, room=room_id)
@@ -568,36 +981,140 @@ def handle_disconnect():
         player = players[request.sid]
         room_id = player.get('room')
         
-        if room_id and room_id in game_rooms:
-            room = game_rooms[room_id]
-            room.remove_player(player['id'])
-            
-            if room.status == 'empty':
-                del game_rooms[room_id]
-            else:
-                socketio.emit('player_left', {
-                    'username': player['username']
-                }, room=room_id)
-            
-            # Actualizar lista de salas
-            socketio.emit('room_list_updated', {
-                'available_rooms': get_available_rooms()
-            })
+        room = game_rooms.get(room_id) if room_id else None
+        if room is not None:
+            with room.lock:
+                room.remove_player(player['id'])
+                
+                if room.status == 'empty':
+                    unregister_room(room_id)
+                else:
+                    game_rooms.refresh(room_id)
+                    socketio.emit('player_left', {
+                        'username': player['username']
+                    }, room=room_id)
         
         del players[request.sid]
 
-def get_available_rooms():
-    available_rooms = []
-    with room_lock:
-        for room_id, room in game_rooms.items():
-            # Solo mostrar salas que no estén llenas, no estén vacías, y no sean juegos AI
-            if not room.is_full() and room.status != 'empty' and not room.is_ai_game:
-                available_rooms.append({
-                    'id': room_id,
-                    'players': len(room.players),
-                    'max_players': 2
-                })
-    return available_rooms
+def register_room(room):
+    """Registra una sala nueva (o devuelve la existente) y arranca el reaper"""
+    global reaper_started
+    with reaper_lock:
+        if not reaper_started:
+            reaper_started = True
+            round_scheduler.schedule(REAPER_INTERVAL, reap_rooms)
+    return game_rooms.add(room)
+
+def allocate_room_id(prefix):
+    """Nuevo ID de sala, reservado para este worker en el almacén compartido"""
+    for _ in range(ROOM_ID_CLAIM_ATTEMPTS):
+        room_id = room_ids.allocate(prefix)
+        if state_store.claim_room(room_id, WORKER_ID, ROOM_CLAIM_TTL):
+            return room_id
+        # Solo pasa si dos workers comparten nombre
+        print(f"⚠️ El ID {room_id} ya tiene dueño en otro worker (¿WORKER_ID repetido?)")
+    raise RuntimeError(f"No se pudo reservar un ID de sala libre; revisa que WORKER_ID "
+                       f"({WORKER_ID!r}) sea único entre workers")
+
+def create_room_id(prefix):
+    """ID para una sala nueva; si no se puede reservar, avisa al cliente y devuelve None"""
+    try:
+        return allocate_room_id(prefix)
+    except Exception as e:
+        # WORKER_ID repetido (RuntimeError) o almacén compartido caído
+        print(f"❌ No se pudo crear la sala: {e}")
+        emit('error', {'message': 'No se pudo crear la sala, inténtalo de nuevo'})
+        return None
+
+def unregister_room(room_id):
+    """Quita una sala del registro, del almacén compartido y sus capturas"""
+    game_rooms.remove(room_id)
+    capture_store.drop_room(room_id)
+    state_store.release_room(room_id)
+
+def reap_rooms():
+    """Cierra las salas abandonadas (solo recorre las vencidas) y se reprograma"""
+    try:
+        try:
+            close_stale_rooms()
+        finally:
+            state_store.refresh_rooms(game_rooms.ids(), WORKER_ID, ROOM_CLAIM_TTL)
+            publish_lobby_state()
+    finally:
+        # Aunque falle el almacén o un emit, el reaper sigue vivo: si no, el
+        # lobby y las salas de este worker caducan en los demás y no vuelven
+        # a publicarse
+        round_scheduler.schedule(REAPER_INTERVAL, reap_rooms)
+    return []
+
+def close_stale_rooms():
+    """Una pasada del reaper: cierra las salas inactivas o demasiado viejas"""
+    global reaped_rooms
+    now = time.time()
+    idle_before = now - ROOM_IDLE_TIMEOUT
+    created_before = now - ROOM_MAX_AGE
+    
+    closed = []
+    for room in game_rooms.pop_stale(idle_before, created_before):
+        with room.lock:
+            # Hubo actividad después de elegirla: vuelve al orden de actividad
+            if room.last_activity >= idle_before and room.created_at >= created_before:
+                game_rooms.touch(room.room_id)
+                continue
+            room.status = 'empty'
+            round_scheduler.cancel(room.capture_timer)
+            unregister_room(room.room_id)
+            closed.append(room.room_id)
+    
+    if closed:
+        reaped_rooms += len(closed)
+        print(f"🧹 {len(closed)} salas abandonadas cerradas")
+        # Un solo aviso para todas las salas cerradas en esta pasada
+        socketio.emit('room_closed', {'reason': 'inactividad'}, to=closed)
+        for room_id in closed:
+            socketio.close_room(room_id)
+
+def schedule_lobby_update():
+    """Programa un envío de diferencias al lobby (uno por ventana, no por cambio)"""
+    global lobby_update_scheduled
+    with lobby_update_lock:
+        if lobby_update_scheduled:
+            return
+        lobby_update_scheduled = True
+    socketio.start_background_task(send_lobby_update)
+
+def send_lobby_update():
+    """Envía a los clientes del lobby los cambios acumulados en la ventana"""
+    global lobby_update_scheduled
+    socketio.sleep(LOBBY_UPDATE_INTERVAL)
+    with lobby_update_lock:
+        lobby_update_scheduled = False
+    delta = game_rooms.pop_lobby_delta()
+    if delta:
+        # Con varios workers cada uno envía sus diferencias con sus versiones
+        delta['worker'] = WORKER_ID
+        publish_lobby_state()
+        socketio.emit('room_list_delta', delta, to=LOBBY_ROOM)
+
+def publish_lobby_state():
+    """Publica la lista del lobby de este worker para los demás workers"""
+    state_store.set_lobby(WORKER_ID, game_rooms.lobby_state(), LOBBY_STATE_TTL)
+
+def lobby_state():
+    """Lista del lobby de todos los workers, con la versión de cada uno"""
+    states = state_store.lobby_states()
+    states[WORKER_ID] = game_rooms.lobby_state()
+    if len(states) == 1:
+        # Un solo worker: la lista cacheada del registro, sin copiarla
+        available_rooms = states[WORKER_ID]['available_rooms']
+    else:
+        available_rooms = [room for state in states.values() for room in state['available_rooms']]
+    return {
+        'available_rooms': available_rooms,
+        'versions': {worker: state['version'] for worker, state in states.items()}
+    }
+
+game_rooms.on_change = schedule_lobby_update
 
 if __name__ == '__main__':
     # Configuración para desarrollo local y producción
@@ -606,4 +1123,5 @@ if __name__ == '__main__':
     # Para desarrollo local, usar debug=False para evitar reinicios
     if port == 5000:
         debug_mode = False
+    start_inference()
     socketio.run(app, host='0.0.0.0', port=port, debug=debug_mode)
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Almacén de capturas de las rondas.
+
+Cada captura se guarda una sola vez, como bytes JPEG reducidos a miniatura,
+en lugar del base64 completo repetido en la sala y en el jugador. Cada sala
+tiene un presupuesto de memoria: al superarlo se descartan las capturas de
+las rondas más antiguas.
+
+La miniatura no se arma aquí: reducir y recodificar tarda milisegundos, así
+que se hace donde la imagen ya está decodificada (el proceso de inferencia)
+y el almacén solo guarda los bytes.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def encode_thumbnail(image, max_size=240, quality=70):
+    """
+    Reduce una imagen ya decodificada y la codifica como JPEG.
+
+    Args:
+        image: Imagen BGR de OpenCV
+        max_size: Lado largo de la miniatura en píxeles
+        quality: Calidad JPEG (0-100)
+
+    Returns:
+        thumbnail: Bytes JPEG, o None si no se pudo codificar
+    """
+    import cv2
+
+    h, w = image.shape[:2]
+    if max(h, w) > max_size:
+        scale = max_size / max(h, w)
+        image = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return encoded.tobytes() if ok else None
+
+
+def make_thumbnail(image_bytes, max_size=240, quality=70, image=None):
+    """
+    Reduce una imagen JPEG/PNG para que su lado largo mida max_size.
+
+    Args:
+        image_bytes: Bytes de la imagen codificada
+        max_size: Lado largo de la miniatura en píxeles
+        quality: Calidad JPEG (0-100)
+        image: La misma imagen ya decodificada, para no decodificarla otra vez
+
+    Returns:
+        thumbnail: Bytes JPEG de la miniatura (o la imagen original si ya es
+            pequeña, no se puede decodificar o no hay OpenCV)
+    """
+    if image is None:
+        try:
+            # Import diferido: el servidor arranca sin OpenCV (ver vision_loader)
+            import cv2
+            import numpy as np
+        except ImportError:
+            return image_bytes
+
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return image_bytes
+
+    thumbnail = encode_thumbnail(image, max_size, quality)
+    if thumbnail is None or len(thumbnail) >= len(image_bytes):
+        return image_bytes
+    return thumbnail
+
+
+class Capture:
+    """
+    Miniatura de la captura de un jugador en una ronda.
+    """
+
+    __slots__ = ('data', 'etag', 'created_at')
+
+    def __init__(self, data):
+        self.data = data
+        # Identificador del contenido (ETag HTTP)
+        self.etag = hashlib.blake2b(data, digest_size=8).hexdigest()
+        self.created_at = time.time()
+
+
+class CaptureStore:
+    def __init__(self, thumbnail_size=240, quality=70, room_budget=256 * 1024):
+        """
+        Capturas por sala, ronda y jugador.
+
+        Args:
+            thumbnail_size: Lado largo con el que se arman las miniaturas
+            quality: Calidad JPEG con la que se arman las miniaturas
+            room_budget: Bytes máximos de capturas guardadas por sala
+        """
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+        self.room_budget = room_budget
+
+        # room_id -> OrderedDict((round, player_id) -> Capture), más antigua primero
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.stored = 0
+        self.evicted = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.bytes_stored = 0
+
+    def put(self, room_id, round_number, player_id, thumbnail, original_size=None):
+        """
+        Guarda la miniatura ya armada de una captura (no decodifica nada).
+
+        Args:
+            room_id: Sala
+            round_number: Número de ronda de la sala
+            player_id: Jugador
+            thumbnail: Bytes JPEG de la miniatura
+            original_size: Bytes de la captura original (para las métricas)
+
+        Returns:
+            capture: Capture guardada, o None si no había imagen
+        """
+        if not thumbnail:
+            return None
+
+        capture = Capture(thumbnail)
+
+        with self._lock:
+            captures = self._rooms.setdefault(room_id, OrderedDict())
+            previous = captures.pop((round_number, player_id), None)
+            if previous is not None:
+                self.bytes_stored -= len(previous.data)
+            captures[(round_number, player_id)] = capture
+
+            self.stored += 1
+            self.bytes_in += original_size or len(thumbnail)
+            self.bytes_out += len(capture.data)
+            self.bytes_stored += len(capture.data)
+            self._evict(captures)
+
+        return capture
+
+    def _evict(self, captures):
+        # Descartar las capturas más antiguas hasta entrar en el presupuesto
+        # (la recién guardada siempre se conserva)
+        total = sum(len(capture.data) for capture in captures.values())
+        while total > self.room_budget and len(captures) > 1:
+            _, oldest = captures.popitem(last=False)
+            total -= len(oldest.data)
+            self.bytes_stored -= len(oldest.data)
+            self.evicted += 1
+
+    def get(self, room_id, round_number, player_id):
+        """
+        Captura guardada, o None si no existe o fue descartada.
+        """
+        with self._lock:
+            captures = self._rooms.get(room_id)
+            if captures is None:
+                return None
+            return captures.get((round_number, player_id))
+
+    def drop_room(self, room_id):
+        """
+        Libera todas las capturas de una sala.
+        """
+        with self._lock:
+            captures = self._rooms.pop(room_id, None)
+            if captures:
+                self.bytes_stored -= sum(len(capture.data) for capture in captures.values())
+
+    def stats(self):
+        """
+        Métricas del almacén para /stats.
+        """
+        with self._lock:
+            return {
+                'rooms': len(self._rooms),
+                'captures': sum(len(captures) for captures in self._rooms.values()),
+                'bytes_stored': self.bytes_stored,
+                'stored': self.stored,
+                'evicted': self.evicted,
+                # Tamaño medio de la miniatura frente a la captura original
+                'compression': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else 0.0,
+                'thumbnail_size': self.thumbnail_size,
+                'room_budget': self.room_budget
+            }
@@ -0,0 +1,138 @@
+"""
+Pool de detectores reutilizables.
+
+Cada instancia de MediaPipe Hands tiene estado y no es thread-safe: el pool
+las crea y calienta al arrancar, y las presta de a una por handler.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from queue import Empty, Queue
+
+
+class DetectorPoolTimeout(Exception):
+    """No se liberó ningún detector a tiempo."""
+
+
+class DetectorPool:
+    def __init__(self, factory, size=2, warm_up=None):
+        """
+        Pool de detectores con préstamo y devolución.
+
+        Args:
+            factory: Función sin argumentos que crea un detector
+            size: Número de detectores
+            warm_up: Función opcional que recibe cada detector recién creado
+                (por ejemplo, una inferencia sobre un frame sintético)
+        """
+        self.factory = factory
+        self.size = size
+        self.warm_up = warm_up
+
+        self._available = Queue()
+        self._lock = threading.Lock()
+        self._started_at = None
+        self.detectors = []
+
+        # Métricas
+        self.in_use = 0
+        self.max_in_use = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.busy_seconds = 0.0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.warm_up_ms = 0.0
+
+    def start(self):
+        """
+        Crea y calienta todos los detectores (no hace nada si ya arrancó).
+        """
+        with self._lock:
+            if self._started_at is not None:
+                return
+            started = time.perf_counter()
+            for _ in range(self.size):
+                detector = self.factory()
+                if self.warm_up:
+                    self.warm_up(detector)
+                self.detectors.append(detector)
+                self._available.put(detector)
+            self.warm_up_ms = (time.perf_counter() - started) * 1000
+            self._started_at = time.time()
+
+    def acquire(self, timeout=None):
+        """
+        Toma un detector libre, esperando hasta timeout segundos.
+
+        Raises:
+            DetectorPoolTimeout: Si no se liberó ninguno a tiempo
+        """
+        if self._started_at is None:
+            self.start()
+
+        waited = time.perf_counter()
+        try:
+            detector = self._available.get(timeout=timeout)
+        except Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise DetectorPoolTimeout(
+                f"Ningún detector libre tras {timeout}s ({self.size} en uso)"
+            )
+        wait_ms = (time.perf_counter() - waited) * 1000
+
+        with self._lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        return detector
+
+    def release(self, detector, busy_seconds=0.0):
+        """
+        Devuelve un detector al pool.
+        """
+        with self._lock:
+            self.in_use -= 1
+            self.busy_seconds += busy_seconds
+        self._available.put(detector)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Presta un detector durante el bloque with.
+
+        Ejemplo:
+            with pool.checkout(timeout=5) as detector:
+                gesture = detector.detect_rps_gesture(image)
+        """
+        detector = self.acquire(timeout)
+        started = time.perf_counter()
+        try:
+            yield detector
+        finally:
+            self.release(detector, time.perf_counter() - started)
+
+    def stats(self):
+        """
+        Métricas de uso del pool.
+        """
+        with self._lock:
+            elapsed = time.time() - self._started_at if self._started_at else 0.0
+            capacity = elapsed * self.size
+            return {
+                'size': self.size,
+                'started': self._started_at is not None,
+                'in_use': self.in_use,
+                'max_in_use': self.max_in_use,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait_ms / self.checkouts, 2) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait_ms, 2),
+                # Fracción del tiempo que los detectores estuvieron prestados
+                'utilization': round(self.busy_seconds / capacity, 4) if capacity > 0 else 0.0,
+                'warm_up_ms': round(self.warm_up_ms, 1)
+            }
@@ -0,0 +1,88 @@
+"""
+Decodificación de las capturas enviadas por el navegador.
+
+Las capturas llegan como adjunto binario de Socket.IO (JPEG en bytes) o,
+en clientes antiguos, como data URL en base64. En el modo landmarks el
+navegador solo envía los 21 puntos de la mano.
+"""
+
+import base64
+import math
+
+
+def capture_bytes(payload):
+    """
+    Obtiene los bytes de la imagen de una captura.
+
+    Args:
+        payload: Bytes del JPEG (adjunto binario) o data URL en base64
+
+    Returns:
+        image_bytes: Bytes de la imagen codificada
+    """
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return bytes(payload)
+
+    # Compatibilidad: "data:image/jpeg;base64,...."
+    return base64.b64decode(payload.split(',', 1)[-1])
+
+
+def decode_image(image_bytes):
+    """
+    Decodifica una imagen directamente a un ndarray BGR con una sola llamada.
+
+    Args:
+        image_bytes: Bytes de la imagen codificada (JPEG/PNG)
+
+    Returns:
+        image: Imagen BGR de OpenCV
+    """
+    # Import diferido: el servidor arranca sin OpenCV (ver vision_loader)
+    import cv2
+    import numpy as np
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return image
+
+
+def parse_landmarks(points, width=640, height=480, normalized=False):
+    """
+    Valida los landmarks enviados por el navegador en el modo landmarks.
+
+    Args:
+        points: Lista de 21 puntos [x, y]
+        width, height: Tamaño de la imagen sobre la que se detectaron
+        normalized: Si True, las coordenadas vienen en [0-1]
+
+    Returns:
+        landmarks: Lista de 21 coordenadas [x, y] en píxeles (float)
+
+    Raises:
+        ValueError: Si los datos no son 21 puntos válidos
+    """
+    if not isinstance(width, (int, float)) or not isinstance(height, (int, float)):
+        raise ValueError("Tamaño de imagen inválido")
+    if not (0 < width <= 4096 and 0 < height <= 4096):
+        raise ValueError(f"Tamaño de imagen fuera de rango: {width}x{height}")
+    if not isinstance(points, (list, tuple)) or len(points) != 21:
+        raise ValueError("Se esperaban 21 landmarks")
+
+    landmarks = []
+    for point in points:
+        if not isinstance(point, (list, tuple)) or len(point) < 2:
+            raise ValueError(f"Landmark inválido: {point!r}")
+        x, y = point[0], point[1]
+        if isinstance(x, bool) or isinstance(y, bool) or \
+                not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+            raise ValueError(f"Landmark inválido: {point!r}")
+        if normalized:
+            x, y = x * width, y * height
+        # MediaPipe puede dar puntos algo fuera de la imagen, pero no lejos
+        if not (math.isfinite(x) and math.isfinite(y)) or \
+                not (-width <= x <= 2 * width and -height <= y <= 2 * height):
+            raise ValueError(f"Landmark fuera de la imagen: {point!r}")
+        landmarks.append([float(x), float(y)])
+
+    return landmarks
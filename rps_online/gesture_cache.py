@@ -0,0 +1,106 @@
+"""
+Caché de gestos por contenido de la captura.
+
+Los clientes que reconectan o reintentan reenvían el mismo JPEG, y las
+pruebas de carga repiten frames idénticos. Con la misma imagen el resultado
+es el mismo, así que se guarda el gesto (y la miniatura de la captura) por
+hash de los bytes y una captura repetida se resuelve sin decodificar ni
+ejecutar MediaPipe.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def capture_key(image_bytes):
+    """
+    Hash rápido de los bytes de la imagen (BLAKE2b de 128 bits).
+    """
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+class GestureCache:
+    def __init__(self, max_entries=256, ttl=60.0):
+        """
+        Caché LRU con expiración.
+
+        Cada entrada guarda el hash, el gesto y una miniatura de pocos KB, así
+        que la memoria queda acotada por max_entries.
+
+        Args:
+            max_entries: Máximo de capturas recordadas (0 = desactivada)
+            ttl: Segundos que vale un resultado
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key):
+        """
+        Resultado guardado para esa captura, o None.
+        """
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            gesture, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            # Más reciente al final
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return gesture
+
+    def put(self, key, gesture):
+        """
+        Guarda el resultado (gesto y miniatura) de esa captura.
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (gesture, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Métricas de la caché para /stats.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expired': self.expired
+            }
@@ -1,20 +1,47 @@
-import cv2
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import mediapipe as mp
 import numpy as np
 
+# Módulos compartidos con la app de escritorio (raíz del repositorio)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gesture_core import GestureClassifier
+from inference_scale import InferenceScaler
+
+from detector_pool import DetectorPool
+
 class GestureDetector:
-    def __init__(self):
+    def __init__(self, batch_workers=None, profile=None, inference_size=None):
         """
         Detector de gestos optimizado para el juego online.
-        """
+        
+        Args:
+            batch_workers: Número de instancias de MediaPipe usadas por
+                detect_rps_gestures (por defecto según los CPUs, máximo 4)
+            profile: Perfil de umbrales de gesture_core (por defecto
+                GESTURE_PROFILE o "online")
+            inference_size: Lado largo (px) al que se reduce la captura antes
+                de MediaPipe, o "auto" (por defecto INFERENCE_SIZE o la
+                resolución completa)
+        """
+        self.classifier = GestureClassifier(profile or os.environ.get('GESTURE_PROFILE', 'online'))
+        self.inference_size = inference_size or os.environ.get('INFERENCE_SIZE')
+        self.min_confidence = float(os.environ.get('INFERENCE_MIN_CONFIDENCE', 0.9))
+        self.scaler = self._create_scaler()
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=True,
-            max_num_hands=1,
-            min_detection_confidence=0.8,
-            min_tracking_confidence=0.7,
-            model_complexity=1
-        )
+        self.hands = self._create_hands()
+        
+        # Pool de detectores para lotes (se crea al primer uso). Cada
+        # instancia del pool tiene su propio escalador: en modo "auto" guarda
+        # el nivel y la última confianza, y no es thread-safe
+        self.batch_workers = batch_workers or min(4, os.cpu_count() or 1)
+        self._batch_scalers = {}
+        self._batch_pool = None
+        self._batch_executor = None
+        self.last_batch_stats = None
         
         self.rps_gestures = {
             "rock": "piedra",
@@ -23,6 +50,41 @@ class GestureDetector:
             "unknown": "desconocido"
         }
     
+    def _create_scaler(self):
+        """
+        Escalador de la resolución de inferencia. En capturas sueltas, si la
+        confianza no alcanza, se reintenta más grande.
+        """
+        return InferenceScaler(self.inference_size, min_confidence=self.min_confidence, retry=True)
+    
+    def _create_batch_hands(self):
+        """
+        Instancia de MediaPipe Hands para el pool de lotes, con su escalador.
+        """
+        hands = self._create_hands()
+        self._batch_scalers[hands] = self._create_scaler()
+        return hands
+    
+    def _create_hands(self):
+        """
+        Crea una instancia de MediaPipe Hands con la configuración del juego.
+        """
+        return self.mp_hands.Hands(
+            static_image_mode=True,
+            max_num_hands=1,
+            min_detection_confidence=0.8,
+            min_tracking_confidence=0.7,
+            model_complexity=1
+        )
+    
+    def warm_up(self, hands=None):
+        """
+        Ejecuta una inferencia sobre un frame sintético para que MediaPipe
+        inicialice su grafo antes de la primera captura real.
+        """
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        self._detect_with(hands or self.hands, blank)
+    
     def detect_rps_gesture(self, image):
         """
         Detecta gesto de piedra, papel o tijeras en una imagen.
@@ -33,139 +95,128 @@ class GestureDetector:
         Returns:
             gesture: "rock", "paper", "scissors", o "unknown"
         """
-        # Convertir BGR a RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        return self._detect_with(self.hands, image)
+    
+    def detect_rps_gestures(self, images):
+        """
+        Detecta gestos en un lote de imágenes (por ejemplo, todas las capturas
+        que llegan en la misma ventana tras el "GO!") repartiéndolas entre un
+        pool de instancias de MediaPipe.
         
-        if results.multi_hand_landmarks:
-            # Tomar la primera mano detectada
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Convertir landmarks a coordenadas
-            h, w = image.shape[:2]
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                landmarks.append([cx, cy])
+        Las métricas del lote quedan en self.last_batch_stats: latencia por
+        imagen (ms), tiempo total (ms) y throughput (imágenes/segundo).
+        
+        Args:
+            images: Lista de imágenes BGR de OpenCV
             
-            # Reconocer gesto
-            return self._classify_rps_gesture(landmarks)
+        Returns:
+            gestures: Lista de gestos en el mismo orden que las imágenes
+        """
+        images = list(images)
+        if not images:
+            self.last_batch_stats = {
+                'batch_size': 0,
+                'latencies_ms': [],
+                'avg_latency_ms': 0.0,
+                'max_latency_ms': 0.0,
+                'total_ms': 0.0,
+                'throughput': 0.0
+            }
+            return []
+        
+        self._ensure_batch_pool()
+        
+        def run(image):
+            # Cada tarea toma una instancia libre; Hands no es thread-safe
+            with self._batch_pool.checkout() as hands:
+                started = time.perf_counter()
+                gesture = self._detect_with(hands, image)
+                return gesture, time.perf_counter() - started
+        
+        batch_start = time.perf_counter()
+        results = list(self._batch_executor.map(run, images))
+        total = time.perf_counter() - batch_start
+        
+        latencies_ms = [latency * 1000 for _, latency in results]
+        self.last_batch_stats = {
+            'batch_size': len(images),
+            'latencies_ms': latencies_ms,
+            'avg_latency_ms': sum(latencies_ms) / len(latencies_ms),
+            'max_latency_ms': max(latencies_ms),
+            'total_ms': total * 1000,
+            'throughput': len(images) / total if total > 0 else 0.0
+        }
         
-        return "unknown"
+        return [gesture for gesture, _ in results]
     
-    def _classify_rps_gesture(self, landmarks):
+    def _ensure_batch_pool(self):
         """
-        Clasifica el gesto basado en los landmarks.
+        Crea las instancias de MediaPipe y el executor del pool de lotes.
         """
-        if len(landmarks) != 21:
-            return "unknown"
-        
-        fingers_up = self._count_fingers(landmarks)
-        
-        # Piedra: Puño cerrado (0-1 dedos)
-        if fingers_up <= 1:
-            if self._is_closed_fist(landmarks):
-                return "rock"
+        if self._batch_executor is not None:
+            return
         
-        # Papel: Mano abierta (4-5 dedos)
-        elif fingers_up >= 4:
-            if self._is_open_hand(landmarks):
-                return "paper"
-        
-        # Tijeras: Índice y medio extendidos (2-3 dedos)
-        elif fingers_up == 2 or fingers_up == 3:
-            if self._is_scissors_gesture(landmarks):
-                return "scissors"
-        
-        return "unknown"
+        self._batch_pool = DetectorPool(
+            self._create_batch_hands,
+            size=self.batch_workers,
+            warm_up=self.warm_up
+        )
+        self._batch_pool.start()
+        self._batch_executor = ThreadPoolExecutor(
+            max_workers=self.batch_workers,
+            thread_name_prefix='gesture-batch'
+        )
     
-    def _count_fingers(self, landmarks):
+    def _detect_with(self, hands, image):
         """
-        Cuenta dedos extendidos.
+        Ejecuta MediaPipe con la instancia indicada y clasifica el gesto.
         """
-        finger_status = []
+        # Reducir (si corresponde), convertir a RGB y procesar con el
+        # escalador propio de la instancia
+        scaler = self._batch_scalers.get(hands, self.scaler)
+        results = scaler.process(hands, image)
         
-        # Pulgar
-        thumb_tip = landmarks[4]
-        thumb_ip = landmarks[3]
-        thumb_mcp = landmarks[2]
-        thumb_extended = self._is_thumb_extended(thumb_tip, thumb_ip, thumb_mcp)
-        finger_status.append(thumb_extended)
-        
-        # Otros dedos
-        finger_tips = [8, 12, 16, 20]
-        finger_pips = [6, 10, 14, 18]
-        finger_mcps = [5, 9, 13, 17]
-        
-        for tip, pip, mcp in zip(finger_tips, finger_pips, finger_mcps):
-            finger_extended = (landmarks[tip][1] < landmarks[pip][1] - 10 and 
-                             landmarks[tip][1] < landmarks[mcp][1])
-            finger_status.append(finger_extended)
+        if results.multi_hand_landmarks:
+            # Tomar la primera mano detectada
+            hand_landmarks = results.multi_hand_landmarks[0]
+            
+            # Convertir landmarks a coordenadas en píxeles de la imagen
+            # original (sin redondear: la mano se normaliza por su tamaño
+            # antes de clasificar)
+            h, w = image.shape[:2]
+            landmarks = [[lm.x * w, lm.y * h] for lm in hand_landmarks.landmark]
+            
+            # Reconocer gesto
+            return self._classify_rps_gesture(landmarks)
         
-        return sum(finger_status)
+        return "unknown"
     
-    def _is_thumb_extended(self, thumb_tip, thumb_ip, thumb_mcp):
+    def classify_landmarks(self, landmarks):
         """
-        Verifica si el pulgar está extendido.
+        Clasifica landmarks ya detectados (por ejemplo, en el navegador).
+        
+        Args:
+            landmarks: Lista de 21 coordenadas [x, y] en píxeles
+            
+        Returns:
+            gesture: "rock", "paper", "scissors", o "unknown"
         """
-        tip_to_mcp = np.sqrt((thumb_tip[0] - thumb_mcp[0])**2 + (thumb_tip[1] - thumb_mcp[1])**2)
-        ip_to_mcp = np.sqrt((thumb_ip[0] - thumb_mcp[0])**2 + (thumb_ip[1] - thumb_mcp[1])**2)
-        return tip_to_mcp > ip_to_mcp * 1.2
+        return self._classify_rps_gesture(landmarks)
     
-    def _is_closed_fist(self, landmarks):
+    def classify_batch(self, landmarks):
         """
-        Verifica si es un puño cerrado.
-        """
-        finger_tips = [8, 12, 16, 20]
-        palm_center = landmarks[9]
-        
-        close_fingers = 0
-        for tip in finger_tips:
-            distance = np.sqrt((landmarks[tip][0] - palm_center[0])**2 + 
-                             (landmarks[tip][1] - palm_center[1])**2)
-            if distance < 80:
-                close_fingers += 1
+        Clasifica muchas manos a la vez con máscaras vectorizadas.
         
-        return close_fingers >= 3
-    
-    def _is_open_hand(self, landmarks):
-        """
-        Verifica si es una mano abierta.
+        Args:
+            landmarks: Array (N, 21, 2) con las coordenadas [x, y] de cada mano
+            
+        Returns:
+            gestures: Array (N,) con "rock", "paper", "scissors" o "unknown"
         """
-        finger_tips = [4, 8, 12, 16, 20]
-        palm_center = landmarks[9]
-        
-        extended_fingers = 0
-        for tip in finger_tips:
-            distance = np.sqrt((landmarks[tip][0] - palm_center[0])**2 + 
-                             (landmarks[tip][1] - palm_center[1])**2)
-            if distance > 60:
-                extended_fingers += 1
-        
-        return extended_fingers >= 4
+        return self.classifier.classify_batch(landmarks)
     
-    def _is_scissors_gesture(self, landmarks):
+    def _classify_rps_gesture(self, landmarks):
         """
-        Verifica si es el gesto de tijeras.
+        Clasifica el gesto basado en los landmarks.
         """
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-        palm_y = landmarks[9][1]
-        
-        # Verificar que índice y medio estén extendidos
-        index_extended = index_tip[1] < palm_y - 15
-        middle_extended = middle_tip[1] < palm_y - 15
-        
-        # Verificar que anular y meñique estén doblados
-        ring_folded = ring_tip[1] > palm_y - 40
-        pinky_folded = pinky_tip[1] > palm_y - 40
-        
-        # Verificar separación entre índice y medio
-        distance = np.sqrt((index_tip[0] - middle_tip[0])**2 + 
-                          (index_tip[1] - middle_tip[1])**2)
-        fingers_separated = distance > 20
-        
-        return (index_extended and middle_extended and 
-                ring_folded and pinky_folded and fingers_separated)
\ No newline at end of file
+        return self.classifier.classify(landmarks)
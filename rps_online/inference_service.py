@@ -0,0 +1,195 @@
+"""
+Servicio de inferencia de gestos en procesos separados.
+
+Cada proceso worker mantiene su propio GestureDetector caliente, así la
+decodificación de la imagen y MediaPipe no bloquean el loop de Socket.IO.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Detector del proceso worker (uno por proceso)
+_detector = None
+
+
+class InferenceQueueFull(Exception):
+    """La cola de inferencia alcanzó su límite (backpressure)."""
+
+
+def _init_worker():
+    """
+    Inicializa el detector una sola vez al arrancar cada proceso worker.
+    """
+    global _detector
+    from gesture_detector import GestureDetector
+    _detector = GestureDetector(batch_workers=1)
+    # Inicializar el grafo de MediaPipe antes de la primera captura real
+    _detector.warm_up()
+
+
+def _warm_up():
+    """
+    Tarea vacía para forzar el arranque de los procesos worker.
+    """
+    return _detector is not None
+
+
+def _detect_from_bytes(image_bytes, thumbnail_size=None, thumbnail_quality=70):
+    """
+    Decodifica la imagen y detecta el gesto dentro del proceso worker; con
+    thumbnail_size también arma la miniatura con la imagen ya decodificada.
+    """
+    from frame_codec import decode_image
+
+    image = decode_image(image_bytes)
+    gesture = _detector.detect_rps_gesture(image)
+    if not thumbnail_size:
+        return gesture
+
+    from capture_store import make_thumbnail
+    return gesture, make_thumbnail(image_bytes, thumbnail_size, thumbnail_quality, image=image)
+
+
+class InferenceService:
+    def __init__(self, workers=2, max_pending=32):
+        """
+        Pool de procesos para inferencia de gestos.
+
+        Args:
+            workers: Número de procesos, cada uno con su GestureDetector
+            max_pending: Máximo de trabajos en cola o en ejecución; por
+                encima de este límite submit() lanza InferenceQueueFull
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self._executor = None
+        self._warm_ups = []
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        # Métricas
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+
+    def start(self):
+        """
+        Arranca los procesos worker y los precalienta.
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+
+            # spawn: no heredar el estado de eventlet ni los hilos de MediaPipe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+
+        self._warm_ups = [self._executor.submit(_warm_up) for _ in range(self.workers)]
+
+    def wait_ready(self, timeout=None):
+        """
+        Espera a que los procesos worker terminen de arrancar y calentarse.
+
+        Returns:
+            ready: True si todos cargaron su detector a tiempo
+        """
+        done, not_done = wait(self._warm_ups, timeout=timeout)
+        return not not_done and all(
+            not future.exception() and future.result() for future in done
+        )
+
+    def submit(self, image_bytes, callback=None, thumbnail_size=None, thumbnail_quality=70):
+        """
+        Encola la detección de gesto de una imagen codificada (JPEG/PNG).
+
+        Args:
+            image_bytes: Bytes de la imagen
+            callback: Función opcional que recibe el Future al terminar
+            thumbnail_size: Si se indica, el worker arma también la miniatura
+            thumbnail_quality: Calidad JPEG de la miniatura
+
+        Returns:
+            future: concurrent.futures.Future con el gesto detectado, o con
+                (gesto, miniatura) si se pidió la miniatura
+        """
+        if self._executor is None:
+            self.start()
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise InferenceQueueFull(
+                    f"Cola de inferencia llena ({self._pending}/{self.max_pending})"
+                )
+            self._pending += 1
+            self.submitted += 1
+            self.max_queue_depth = max(self.max_queue_depth, self._pending)
+            executor = self._executor
+
+        try:
+            future = executor.submit(_detect_from_bytes, image_bytes, thumbnail_size, thumbnail_quality)
+        except (BrokenProcessPool, RuntimeError):
+            # Pool roto o ya cerrado: liberar el lugar reservado y descartar
+            # el pool para que el próximo submit arranque uno nuevo
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        future.add_done_callback(self._on_done)
+        if callback:
+            future.add_done_callback(callback)
+        return future
+
+    def _on_done(self, future):
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or error is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            # Si un worker murió, el pool queda inutilizable: recrearlo al próximo submit
+            if isinstance(error, BrokenProcessPool):
+                self._executor = None
+
+    def queue_depth(self):
+        """
+        Trabajos enviados que aún no terminaron.
+        """
+        return self._pending
+
+    def stats(self):
+        """
+        Métricas del servicio para monitoreo.
+        """
+        return {
+            'workers': self.workers,
+            'running': self._executor is not None,
+            'queue_depth': self._pending,
+            'max_queue_depth': self.max_queue_depth,
+            'max_pending': self.max_pending,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        """
+        Detiene los procesos worker.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,114 @@
+"""
+Generación de IDs de sala.
+
+Los IDs salían del reloj en milisegundos módulo 10000: dos salas creadas en
+el mismo milisegundo (o con 10 s de diferencia) recibían el mismo ID. Aquí
+cada ID es un contador creciente en base 36, único en el proceso, más un
+sufijo aleatorio de 6 caracteres (unos 31 bits, de secrets) para que no se
+puedan adivinar las salas vecinas a partir del contador.
+Generar un ID es O(1) y no hace falta comprobar si ya existe.
+
+Con varios workers el ID lleva además el nombre del worker que creó la sala
+y su número de arranque ('room_w2-3.1a3xk9fq'): los contadores de cada worker
+no chocan entre sí ni con los de un arranque anterior del mismo worker, y
+el proxy puede enrutar los eventos de la sala a su dueño leyendo el prefijo.
+"""
+
+import os
+import re
+import secrets
+import socket
+import threading
+
+ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Nombres de worker válidos: van en los IDs de sala y en las URLs
+WORKER_NAME = re.compile(r'^[a-z0-9.]+$')
+
+
+def worker_id(configured=None, shared=False):
+    """
+    Nombre de este worker para los IDs de sala.
+
+    Args:
+        configured: WORKER_ID del entorno (vacío o None si no se definió)
+        shared: True si hay varios workers (con cola de mensajes)
+
+    Returns:
+        worker: El nombre configurado; sin él, '' con un solo proceso o
+            '<hostname>.<pid>' con varios (el pid solo no basta: en
+            contenedores la app suele ser el pid 1)
+    """
+    if configured:
+        if not WORKER_NAME.match(configured):
+            raise ValueError(f"WORKER_ID inválido: {configured!r} (solo a-z, 0-9 y '.')")
+        return configured
+    if not shared:
+        return ''
+    host = re.sub(r'[^a-z0-9]', '', socket.gethostname().lower()) or 'host'
+    return f"{host}.{os.getpid()}"
+
+
+def to_base36(number):
+    """
+    Número entero no negativo en base 36 (0-9, a-z).
+    """
+    digits = []
+    while True:
+        number, digit = divmod(number, 36)
+        digits.append(ALPHABET[digit])
+        if number == 0:
+            return ''.join(reversed(digits))
+
+
+class RoomIdAllocator:
+    def __init__(self, suffix_length=6, start=0, worker='', epoch=None):
+        """
+        IDs de sala únicos y cortos.
+
+        Args:
+            suffix_length: Caracteres aleatorios al final (0 = sin sufijo)
+            start: Primer valor del contador
+            worker: Nombre del worker que crea las salas ('' = un solo proceso)
+            epoch: Número de arranque del worker (ver
+                state_store.next_epoch), o None para no incluirlo
+        """
+        self.worker = worker
+        self.epoch = epoch
+        self.suffix_length = suffix_length
+        self._next = start
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.allocated = 0
+
+    def allocate(self, prefix):
+        """
+        Nuevo ID con el formato '<prefix>_<contador><sufijo>', o
+        '<prefix>_<worker>-<arranque>.<contador><sufijo>' si hay nombre de
+        worker.
+
+        El contador hace al ID único; el sufijo solo lo hace impredecible.
+        """
+        with self._lock:
+            number = self._next
+            self._next += 1
+            self.allocated += 1
+        # Aleatoriedad criptográfica: el sufijo es lo único que no se deduce
+        suffix = ''.join(secrets.choice(ALPHABET) for _ in range(self.suffix_length))
+        if self.worker:
+            epoch = f"{to_base36(self.epoch)}." if self.epoch is not None else ''
+            return f"{prefix}_{self.worker}-{epoch}{to_base36(number)}{suffix}"
+        return f"{prefix}_{to_base36(number)}{suffix}"
+
+    def stats(self):
+        """
+        Métricas del generador para /stats.
+        """
+        with self._lock:
+            return {
+                'worker': self.worker,
+                'epoch': self.epoch,
+                'allocated': self.allocated,
+                'next': to_base36(self._next),
+                'suffix_length': self.suffix_length
+            }
@@ -0,0 +1,284 @@
+"""
+Registro de salas con índice de salas abiertas.
+
+El lobby solo muestra las salas multijugador con lugar libre. En lugar de
+recorrer todas las salas en cada cambio, el registro mantiene ese índice de
+forma incremental y guarda la lista del lobby ya armada hasta el próximo
+cambio. También acumula qué salas cambiaron desde el último envío, para
+mandar a los clientes del lobby solo las diferencias.
+
+Para encontrar salas abandonadas sin recorrerlas todas, las salas se
+ordenan por última actividad (la menos activa primero) y por creación: el
+reaper solo mira el principio de cada orden.
+"""
+
+import time
+from collections import OrderedDict
+
+from timed_lock import TimedLock, lock_stats, new_lock_totals, retire_lock
+
+MAX_PLAYERS = 2
+
+
+def lobby_entry(room):
+    """
+    Datos de una sala para la lista del lobby, o None si no debe aparecer.
+
+    Solo se muestran salas que no estén llenas, no estén vacías y no sean
+    juegos contra la IA.
+    """
+    if room.is_full() or room.status == 'empty' or room.is_ai_game:
+        return None
+    return {
+        'id': room.room_id,
+        'players': len(room.players),
+        'max_players': MAX_PLAYERS
+    }
+
+
+class RoomRegistry:
+    def __init__(self, on_change=None):
+        """
+        Salas por ID, con el índice de salas abiertas para el lobby.
+
+        Args:
+            on_change: Función sin argumentos que se llama (fuera del lock)
+                cada vez que cambia la lista del lobby
+        """
+        self.on_change = on_change
+        self._rooms = {}
+        # room_id -> entrada del lobby, en orden de apertura
+        self._open = {}
+        # Lock corto: solo protege los diccionarios, nunca el estado de una sala
+        self._lock = TimedLock()
+        # Esperas acumuladas de los locks de salas ya cerradas
+        self._retired_room_locks = new_lock_totals()
+
+        # room_id por última actividad (la menos activa primero) y
+        # room_id -> created_at por creación; remove() saca la sala de ambos
+        self._activity = OrderedDict()
+        self._created = OrderedDict()
+
+        # Aumenta con cada cambio del lobby
+        self.version = 0
+
+        # Última lista enviada a los clientes y salas cambiadas desde entonces
+        self._published = {}
+        self._published_version = 0
+        # Lista publicada ya armada (None = hay que reconstruirla)
+        self._published_snapshot = None
+        self._dirty = {}
+
+        # Métricas
+        self.snapshot_builds = 0
+        self.snapshot_hits = 0
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def __getitem__(self, room_id):
+        return self._rooms[room_id]
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def get(self, room_id, default=None):
+        return self._rooms.get(room_id, default)
+
+    def ids(self):
+        """
+        IDs de todas las salas registradas.
+        """
+        with self._lock:
+            return list(self._rooms)
+
+    def add(self, room):
+        """
+        Registra una sala nueva (o devuelve la existente con ese ID).
+        """
+        with self._lock:
+            existing = self._rooms.get(room.room_id)
+            if existing is not None:
+                return existing
+            self._rooms[room.room_id] = room
+            room.last_activity = time.time()
+            self._activity[room.room_id] = True
+            self._created[room.room_id] = room.created_at
+            changed = self._update_open(room)
+        self._notify(changed)
+        return room
+
+    def remove(self, room_id):
+        """
+        Quita una sala del registro y del lobby.
+        """
+        with self._lock:
+            room = self._rooms.pop(room_id, None)
+            if room is not None:
+                retire_lock(self._retired_room_locks, room.lock)
+                self._activity.pop(room_id, None)
+                self._created.pop(room_id, None)
+            changed = self._open.pop(room_id, None) is not None
+            if changed:
+                self._invalidate(room_id)
+        self._notify(changed)
+        return room
+
+    def refresh(self, room_id):
+        """
+        Actualiza el lobby tras cambiar jugadores, estado o tipo de una sala.
+
+        Returns:
+            changed: True si la lista del lobby cambió
+        """
+        with self._lock:
+            room = self._rooms.get(room_id)
+            changed = room is not None and self._update_open(room)
+        self._notify(changed)
+        return changed
+
+    def touch(self, room_id):
+        """
+        Registra actividad en una sala (la pasa al final del orden).
+        """
+        with self._lock:
+            room = self._rooms.get(room_id)
+            if room is None:
+                return
+            room.last_activity = time.time()
+            self._activity[room_id] = True
+            self._activity.move_to_end(room_id)
+
+    def pop_stale(self, idle_before, created_before):
+        """
+        Salas sin actividad desde idle_before o creadas antes de
+        created_before. Solo recorre las salas vencidas, O(vencidas).
+
+        Las salas devueltas salen de ambos órdenes: si al final no se
+        cierran, hay que volver a llamar a touch() (y una sala que superó
+        la edad máxima no vuelve a elegirse por edad).
+
+        Returns:
+            rooms: Lista de GameRoom a revisar y cerrar
+        """
+        stale = {}
+        with self._lock:
+            while self._activity:
+                room_id = next(iter(self._activity))
+                room = self._rooms[room_id]
+                if room.last_activity >= idle_before:
+                    break
+                self._activity.popitem(last=False)
+                stale[room_id] = room
+
+            while self._created:
+                room_id, created_at = next(iter(self._created.items()))
+                if created_at >= created_before:
+                    break
+                self._created.popitem(last=False)
+                stale[room_id] = self._rooms[room_id]
+        return list(stale.values())
+
+    def _update_open(self, room):
+        entry = lobby_entry(room)
+        current = self._open.get(room.room_id)
+        if entry == current:
+            return False
+
+        if entry is None:
+            del self._open[room.room_id]
+        else:
+            self._open[room.room_id] = entry
+        self._invalidate(room.room_id)
+        return True
+
+    def _invalidate(self, room_id):
+        self.version += 1
+        self._dirty[room_id] = True
+
+    def _notify(self, changed):
+        if changed and self.on_change:
+            self.on_change()
+
+    def lobby_state(self):
+        """
+        Última lista enviada a los clientes del lobby, con su versión.
+
+        Es la base exacta sobre la que se aplican las siguientes diferencias
+        (pop_lobby_delta), así que un cliente que llega no pierde ni repite
+        cambios. Puede ir atrasada como mucho una ventana de envío.
+
+        La lista se arma una sola vez por envío y se comparte entre todos los
+        clientes que llegan, así que no debe modificarse.
+        """
+        with self._lock:
+            if self._published_snapshot is None:
+                self._published_snapshot = list(self._published.values())
+                self.snapshot_builds += 1
+            else:
+                self.snapshot_hits += 1
+            return {
+                'available_rooms': self._published_snapshot,
+                'version': self._published_version
+            }
+
+    def pop_lobby_delta(self):
+        """
+        Diferencias del lobby desde el último envío, combinadas por sala:
+        varios cambios de una misma sala dan una sola entrada, y una sala que
+        se abrió y cerró entre dos envíos no aparece.
+
+        Returns:
+            delta: {'added', 'changed', 'removed', 'from_version', 'version'},
+                o None si no hay nada que enviar
+        """
+        with self._lock:
+            added, changed, removed = [], [], []
+            for room_id in self._dirty:
+                entry = self._open.get(room_id)
+                previous = self._published.get(room_id)
+                if entry == previous:
+                    continue
+                if entry is None:
+                    del self._published[room_id]
+                    removed.append(room_id)
+                else:
+                    self._published[room_id] = entry
+                    (changed if previous else added).append(entry)
+            self._dirty = {}
+
+            if not (added or changed or removed):
+                return None
+            self._published_snapshot = None
+
+            delta = {
+                'added': added,
+                'changed': changed,
+                'removed': removed,
+                'from_version': self._published_version,
+                'version': self.version
+            }
+            self._published_version = self.version
+        return delta
+
+    def stats(self):
+        """
+        Métricas del registro para /stats.
+        """
+        with self._lock:
+            return {
+                'rooms': len(self._rooms),
+                # Deben coincidir con rooms: las salas cerradas no quedan en los órdenes
+                'activity_index': len(self._activity),
+                'created_index': len(self._created),
+                'open_rooms': len(self._open),
+                'published_version': self._published_version,
+                'version': self.version,
+                'snapshot_builds': self.snapshot_builds,
+                'snapshot_hits': self.snapshot_hits,
+                'registry_lock': self._lock.stats(),
+                'room_locks': lock_stats(
+                    [room.lock for room in self._rooms.values()],
+                    self._retired_room_locks
+                )
+            }
@@ -0,0 +1,177 @@
+"""
+Planificador central de los tiempos de las rondas.
+
+En lugar de una tarea dormida por sala (cuenta atrás con sleep), un único
+loop mantiene un heap de timers ordenado por vencimiento. En cada tick
+ejecuta los timers vencidos y agrupa sus emits: el mismo evento con los
+mismos datos para varias salas sale en un solo emit con una lista de salas.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Timer:
+    """
+    Timer pendiente; RoundScheduler.cancel() lo descarta sin sacarlo del heap.
+    """
+
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled', 'done')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        # Ya salió del heap para ejecutarse
+        self.done = False
+
+
+class RoundScheduler:
+    def __init__(self, socketio, tick=0.05):
+        """
+        Loop de timers con emits agrupados por tick.
+
+        Args:
+            socketio: Instancia de SocketIO (tareas, sleep y emits)
+            tick: Segundos máximos entre dos revisiones del heap
+        """
+        self.socketio = socketio
+        self.tick = tick
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._running = False
+
+        # Métricas
+        self.pending = 0
+        self.max_pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.emits = 0
+        self.emits_batched = 0
+        self.errors = 0
+        self.max_lag = 0.0
+
+    def schedule(self, delay, callback, *args):
+        """
+        Programa callback(*args) dentro de delay segundos.
+
+        El callback corre en el loop del planificador y devuelve una lista de
+        emits (evento, datos, sala) que se envían agrupados al final del tick.
+
+        Returns:
+            timer: Timer que se puede cancelar
+        """
+        timer = Timer(time.monotonic() + delay, callback, args)
+        with self._lock:
+            heapq.heappush(self._heap, (timer.deadline, next(self._sequence), timer))
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            start = not self._running
+            self._running = True
+
+        if start:
+            self.socketio.start_background_task(self._run)
+        return timer
+
+    def cancel(self, timer):
+        """
+        Cancela un timer pendiente (no hace nada si ya se ejecutó).
+        """
+        with self._lock:
+            if timer is not None and not timer.cancelled and not timer.done:
+                timer.cancelled = True
+                self.pending -= 1
+                self.cancelled += 1
+
+    def _pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, timer = heapq.heappop(self._heap)
+                if timer.cancelled:
+                    continue
+                timer.done = True
+                self.pending -= 1
+                due.append(timer)
+            next_deadline = self._heap[0][0] if self._heap else None
+        return due, next_deadline
+
+    def _run(self):
+        try:
+            while True:
+                next_deadline = None
+                try:
+                    now = time.monotonic()
+                    due, next_deadline = self._pop_due(now)
+                    if due:
+                        self.run_timers(due, now)
+                except Exception as e:
+                    # Un fallo en una vuelta no puede parar los timers de
+                    # todas las salas del worker
+                    self.errors += 1
+                    print(f"❌ Error en el loop de rondas: {e}")
+
+                # Dormir hasta el próximo vencimiento, como mucho un tick (un
+                # timer nuevo más cercano se ve en la siguiente vuelta)
+                wait = self.tick
+                if next_deadline is not None:
+                    wait = min(wait, max(0.0, next_deadline - time.monotonic()))
+                self.socketio.sleep(wait)
+        finally:
+            # Si el loop termina igual, el próximo schedule() lo vuelve a lanzar
+            with self._lock:
+                self._running = False
+
+    def run_timers(self, timers, now):
+        """
+        Ejecuta timers vencidos y envía sus emits agrupados.
+        """
+        batches = {}
+        for timer in timers:
+            # Retraso respecto del vencimiento (tick y carga del loop)
+            self.max_lag = max(self.max_lag, now - timer.deadline)
+            try:
+                emits = timer.callback(*timer.args) or []
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Error en timer de ronda {timer.callback.__name__}: {e}")
+                continue
+            self.fired += 1
+            for event, data, room in emits:
+                # Mismo evento y mismos datos: un solo emit para todas las salas
+                key = (event, repr(sorted(data.items())))
+                batches.setdefault(key, (event, data, []))[2].append(room)
+
+        for event, data, rooms in batches.values():
+            try:
+                self.socketio.emit(event, data, to=rooms if len(rooms) > 1 else rooms[0])
+            except Exception as e:
+                # Por ejemplo, la cola de mensajes no responde: se pierde este
+                # emit, no los demás ni el loop
+                self.errors += 1
+                print(f"❌ Error enviando {event} a {len(rooms)} sala(s): {e}")
+                continue
+            self.emits += 1
+            self.emits_batched += len(rooms)
+
+    def stats(self):
+        """
+        Métricas del planificador para /stats.
+        """
+        with self._lock:
+            return {
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'fired': self.fired,
+                'cancelled': self.cancelled,
+                # Emits enviados y salas que cubrieron
+                'emits': self.emits,
+                'room_emits': self.emits_batched,
+                'errors': self.errors,
+                'max_lag_ms': round(self.max_lag * 1000, 2)
+            }
@@ -6,7 +6,7 @@ Script optimizado para desarrollo y producción
 
 import os
 import sys
-from app import app, socketio
+from app import app, socketio, start_inference
 
 def main():
     """Función principal para ejecutar el servidor"""
@@ -34,6 +34,9 @@ def main():
     print("⌨️  Presiona Ctrl+C para detener el servidor")
     print()
     
+    # Cargar y calentar la visión (en segundo plano salvo VISION_LOAD=eager)
+    start_inference()
+    
     try:
         # Ejecutar servidor con SocketIO
         socketio.run(
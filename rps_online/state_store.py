@@ -0,0 +1,220 @@
+"""
+Estado compartido entre procesos del servidor.
+
+Con varios workers, cada sala vive (jugadores, locks, timers) en el worker
+que la creó, y los eventos de esa sala se enrutan a ese worker por el
+prefijo de su ID. Lo que todos los workers necesitan ver está en este
+almacén:
+
+- Dueño de cada sala: para saber si una sala existe aunque viva en otro
+  worker. La reserva caduca si el worker deja de renovarla, así que las
+  salas de un worker caído dejan de existir para los demás.
+- Arranques de cada worker: un número que sube en cada arranque y va en
+  los IDs de sala, para que un worker reiniciado con el mismo nombre no
+  repita los IDs de antes.
+- Lista del lobby de cada worker: para armar la lista completa de salas
+  abiertas. Se republica periódicamente y caduca, así que un worker caído
+  deja de aparecer.
+
+MemoryStore (por defecto) guarda todo en el proceso: sirve para un solo
+worker y como almacén falso en pruebas y benchmarks. RedisStore comparte
+el estado entre procesos (requiere el paquete redis).
+"""
+
+import json
+import threading
+import time
+
+
+class MemoryStore:
+    def __init__(self):
+        """
+        Almacén en memoria del proceso.
+        """
+        # room_id -> (worker, vencimiento o None si no caduca)
+        self._owners = {}
+        # worker -> (estado del lobby, vencimiento)
+        self._lobbies = {}
+        self._epochs = {}
+        self._lock = threading.Lock()
+
+    def _owner(self, room_id, now):
+        entry = self._owners.get(room_id)
+        if entry is None:
+            return None
+        worker, expires = entry
+        if expires is not None and expires <= now:
+            del self._owners[room_id]
+            return None
+        return worker
+
+    def claim_room(self, room_id, worker, ttl=None):
+        """
+        Registra el worker dueño de una sala durante ttl segundos (None =
+        sin vencimiento).
+
+        Returns:
+            claimed: False si la sala ya tenía dueño
+        """
+        now = time.time()
+        with self._lock:
+            if self._owner(room_id, now) is not None:
+                return False
+            self._owners[room_id] = (worker, now + ttl if ttl is not None else None)
+            return True
+
+    def refresh_rooms(self, room_ids, worker, ttl):
+        """
+        Renueva por ttl segundos las reservas de las salas de un worker.
+        """
+        now = time.time()
+        with self._lock:
+            for room_id in room_ids:
+                if self._owner(room_id, now) == worker:
+                    self._owners[room_id] = (worker, now + ttl)
+
+    def release_room(self, room_id):
+        with self._lock:
+            self._owners.pop(room_id, None)
+
+    def room_owner(self, room_id):
+        """
+        Worker dueño de la sala, o None si no existe (o su reserva caducó).
+        """
+        with self._lock:
+            return self._owner(room_id, time.time())
+
+    def next_epoch(self, worker):
+        """
+        Número de arranque del worker: 1 la primera vez, luego 2, 3...
+        """
+        with self._lock:
+            self._epochs[worker] = self._epochs.get(worker, 0) + 1
+            return self._epochs[worker]
+
+    def set_lobby(self, worker, state, ttl):
+        """
+        Publica la lista del lobby de un worker durante ttl segundos.
+        """
+        with self._lock:
+            self._lobbies[worker] = (state, time.time() + ttl)
+
+    def lobby_states(self):
+        """
+        Listas del lobby vigentes, por worker.
+        """
+        now = time.time()
+        with self._lock:
+            return {worker: state for worker, (state, expires) in self._lobbies.items()
+                    if expires > now}
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'rooms': sum(1 for room_id in list(self._owners) if self._owner(room_id, now)),
+                'workers': len(self._lobbies)
+            }
+
+
+class RedisStore:
+    def __init__(self, url, namespace='rps'):
+        """
+        Almacén compartido en Redis (o un servidor compatible).
+
+        Args:
+            url: URL de conexión, p. ej. redis://localhost:6379/0
+            namespace: Prefijo de las claves
+        """
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("STATE_STORE_URL usa Redis pero el paquete redis no está instalado")
+
+        self._redis = redis.Redis.from_url(url)
+        # Una clave por sala: cada reserva caduca por separado
+        self._room_prefix = f"{namespace}:room:"
+        self._lobby_prefix = f"{namespace}:lobby:"
+        self._epoch_prefix = f"{namespace}:epoch:"
+
+    def claim_room(self, room_id, worker, ttl=None):
+        px = int(ttl * 1000) if ttl is not None else None
+        return bool(self._redis.set(self._room_prefix + room_id, worker, nx=True, px=px))
+
+    def refresh_rooms(self, room_ids, worker, ttl):
+        pipe = self._redis.pipeline(transaction=False)
+        for room_id in room_ids:
+            pipe.pexpire(self._room_prefix + room_id, int(ttl * 1000))
+        pipe.execute()
+
+    def release_room(self, room_id):
+        self._redis.delete(self._room_prefix + room_id)
+
+    def room_owner(self, room_id):
+        owner = self._redis.get(self._room_prefix + room_id)
+        return owner.decode() if owner is not None else None
+
+    def next_epoch(self, worker):
+        return int(self._redis.incr(self._epoch_prefix + worker))
+
+    def set_lobby(self, worker, state, ttl):
+        # La clave caduca sola si el worker deja de republicar
+        self._redis.set(self._lobby_prefix + worker, json.dumps(state), px=int(ttl * 1000))
+
+    def lobby_states(self):
+        keys = list(self._redis.scan_iter(match=self._lobby_prefix + '*'))
+        if not keys:
+            return {}
+        states = {}
+        for key, value in zip(keys, self._redis.mget(keys)):
+            # Puede caducar entre el scan y el mget
+            if value is not None:
+                states[key.decode()[len(self._lobby_prefix):]] = json.loads(value)
+        return states
+
+    def stats(self):
+        return {
+            'backend': 'redis',
+            'rooms': sum(1 for _ in self._redis.scan_iter(match=self._room_prefix + '*', count=1000)),
+            'workers': len(self.lobby_states())
+        }
+
+
+# Esquemas de URL que sirven tanto de cola de mensajes como de almacén
+REDIS_SCHEMES = ('redis://', 'rediss://', 'unix://')
+
+
+def store_url(configured, message_queue):
+    """
+    URL del almacén a usar.
+
+    Sin STATE_STORE_URL se reutiliza la cola de mensajes si es Redis; una
+    cola amqp:// o kafka:// no sirve como almacén, así que hay que indicarlo.
+
+    Args:
+        configured: STATE_STORE_URL del entorno (None si no se definió)
+        message_queue: SOCKETIO_MESSAGE_QUEUE (None sin cola)
+    """
+    if configured:
+        return configured
+    if not message_queue:
+        return 'memory://'
+    if message_queue.startswith(REDIS_SCHEMES):
+        return message_queue
+    raise ValueError(
+        f"SOCKETIO_MESSAGE_QUEUE={message_queue} no sirve como almacén de estado: "
+        f"define STATE_STORE_URL (p. ej. redis://host:6379/0)"
+    )
+
+
+def open_store(url):
+    """
+    Almacén según la URL: vacía o memory:// para MemoryStore, redis:// o
+    rediss:// para RedisStore.
+    """
+    if not url or url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith(REDIS_SCHEMES):
+        return RedisStore(url)
+    raise ValueError(f"STATE_STORE_URL no soportada: {url}")
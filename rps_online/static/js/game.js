@@ -7,6 +7,7 @@ class GameManager {
         this.playerId = null;
         this.gameState = 'waiting'; // waiting, ready, countdown, capturing, results
         this.isAIGame = false; // Seguimiento del modo AI
+        this.captureRound = null; // Ronda de la última orden de captura
 
         this.init();
     }
@@ -16,6 +17,16 @@ class GameManager {
         this.setupEventListeners();
         this.camera = new CameraManager();
 
+        // Modo landmarks opcional: detección de la mano en el navegador
+        this.landmarkDetector = null;
+        if (LandmarkDetector.isEnabled()) {
+            this.landmarkDetector = new LandmarkDetector();
+            this.landmarkDetector.init().catch((error) => {
+                console.warn('⚠️ Modo landmarks no disponible, se enviarán imágenes:', error);
+                this.landmarkDetector = null;
+            });
+        }
+
         // Verificar soporte de cámara
         if (!CameraManager.isSupported()) {
             this.showError('Tu navegador no soporta acceso a cámara');
@@ -26,7 +37,8 @@ class GameManager {
     }
 
     setupSocket() {
-        this.socket = io();
+        // La sala viaja en la conexión para que el proxy la enrute al worker dueño
+        this.socket = io({ query: { room: this.roomId } });
 
         // Eventos de conexión
         this.socket.on('connect', () => {
@@ -53,12 +65,20 @@ class GameManager {
             this.handlePlayerLeft(data);
         });
 
+        this.socket.on('room_closed', (data) => {
+            console.log('🧹 Sala cerrada por el servidor:', data);
+            this.showError('La sala se cerró por inactividad');
+            setTimeout(() => this.leaveRoom(), 2000);
+        });
+
         // Eventos de juego
         this.socket.on('countdown', (data) => {
             this.handleCountdown(data);
         });
 
-        this.socket.on('capture_gesture', () => {
+        this.socket.on('capture_gesture', (data) => {
+            // El servidor solo acepta la captura con el número de esta ronda
+            this.captureRound = data ? data.round : null;
             this.captureGesture();
         });
 
@@ -454,14 +474,22 @@ class GameManager {
         document.getElementById('gameStatus').textContent = `Countdown: ${count}`;
     }
 
-    captureGesture() {
+    async captureGesture() {
+        if (this.landmarkDetector && this.landmarkDetector.ready) {
+            return this.captureLandmarks();
+        }
+
         try {
-            // Capturar imagen de la cámara
-            const imageData = this.camera.captureImage();
+            // Capturar imagen de la cámara: JPEG binario si el navegador lo
+            // soporta, data URL en base64 si no
+            const imageData = CameraManager.supportsBinaryCapture()
+                ? await this.camera.captureImageBinary()
+                : this.camera.captureImage();
 
             // Enviar al servidor para análisis
             this.socket.emit('gesture_capture', {
-                image: imageData
+                image: imageData,
+                round: this.captureRound
             });
 
             document.getElementById('gameStatus').textContent = 'Analizando gesto...';
@@ -471,6 +499,28 @@ class GameManager {
         }
     }
 
+    async captureLandmarks() {
+        try {
+            // Detectar la mano en el navegador y enviar solo los landmarks
+            const frame = this.camera.captureFrame();
+            const landmarks = await this.landmarkDetector.detect(frame);
+            const thumbnail = await this.landmarkDetector.createThumbnail(frame);
+
+            this.socket.emit('gesture_landmarks', {
+                landmarks: landmarks,
+                width: frame.width,
+                height: frame.height,
+                thumbnail: thumbnail,
+                round: this.captureRound
+            });
+
+            document.getElementById('gameStatus').textContent = 'Analizando gesto...';
+
+        } catch (error) {
+            this.showError('Error al detectar la mano: ' + error.message);
+        }
+    }
+
     showResults(data) {
         console.log('Resultados:', data);
         this.gameState = 'results';
@@ -491,12 +541,13 @@ class GameManager {
 
             // Jugador 1
             document.getElementById('result1Name').textContent = p1.username;
-            document.getElementById('result1Image').src = 'data:image/jpeg;base64,' + p1.capture;
+            // Las miniaturas se descargan aparte (cacheables), no van en el evento
+            document.getElementById('result1Image').src = p1.capture_url || '';
             document.getElementById('result1Gesture').textContent = this.translateGesture(p1.gesture);
 
             // Jugador 2
             document.getElementById('result2Name').textContent = p2.username;
-            document.getElementById('result2Image').src = 'data:image/jpeg;base64,' + p2.capture;
+            document.getElementById('result2Image').src = p2.capture_url || '';
             document.getElementById('result2Gesture').textContent = this.translateGesture(p2.gesture);
         }
 
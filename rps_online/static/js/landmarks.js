@@ -0,0 +1,94 @@
+// Landmarks JavaScript - Detección de la mano en el navegador
+// Modo opcional: el cliente envía solo los 21 landmarks en lugar de la imagen
+const MEDIAPIPE_HANDS_URL = 'https://cdn.jsdelivr.net/npm/@mediapipe/hands';
+
+class LandmarkDetector {
+    constructor() {
+        this.hands = null;
+        this.ready = false;
+        this.pendingResolve = null;
+        this.thumbnailCanvas = null;
+    }
+
+    // El modo se activa con ?mode=landmarks o localStorage.rps_landmark_mode = '1'
+    static isEnabled() {
+        const params = new URLSearchParams(window.location.search);
+        return params.get('mode') === 'landmarks' ||
+            localStorage.getItem('rps_landmark_mode') === '1';
+    }
+
+    async init() {
+        await this.loadScript(`${MEDIAPIPE_HANDS_URL}/hands.js`);
+
+        this.hands = new Hands({
+            locateFile: (file) => `${MEDIAPIPE_HANDS_URL}/${file}`
+        });
+        this.hands.setOptions({
+            maxNumHands: 1,
+            modelComplexity: 1,
+            minDetectionConfidence: 0.8,
+            minTrackingConfidence: 0.7
+        });
+        this.hands.onResults((results) => {
+            if (this.pendingResolve) {
+                this.pendingResolve(results);
+                this.pendingResolve = null;
+            }
+        });
+        await this.hands.initialize();
+
+        this.ready = true;
+        console.log('✋ Detector de landmarks listo en el navegador');
+    }
+
+    loadScript(src) {
+        return new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = src;
+            script.crossOrigin = 'anonymous';
+            script.onload = resolve;
+            script.onerror = () => reject(new Error('No se pudo cargar ' + src));
+            document.head.appendChild(script);
+        });
+    }
+
+    // Detecta la mano en el canvas y devuelve los landmarks en píxeles
+    // del canvas, o null si no hay mano
+    async detect(canvas) {
+        const results = await new Promise((resolve, reject) => {
+            this.pendingResolve = resolve;
+            this.hands.send({ image: canvas }).catch(reject);
+        });
+
+        if (!results.multiHandLandmarks || results.multiHandLandmarks.length === 0) {
+            return null;
+        }
+
+        return results.multiHandLandmarks[0].map(
+            (lm) => [lm.x * canvas.width, lm.y * canvas.height]
+        );
+    }
+
+    // Miniatura JPEG pequeña para la pantalla de resultados
+    createThumbnail(source, width = 160, height = 120) {
+        if (!this.thumbnailCanvas) {
+            this.thumbnailCanvas = document.createElement('canvas');
+        }
+        this.thumbnailCanvas.width = width;
+        this.thumbnailCanvas.height = height;
+        this.thumbnailCanvas.getContext('2d').drawImage(source, 0, 0, width, height);
+
+        return new Promise((resolve) => {
+            this.thumbnailCanvas.toBlob((blob) => {
+                if (!blob) {
+                    resolve(null);
+                    return;
+                }
+                blob.arrayBuffer().then(resolve, () => resolve(null));
+            }, 'image/jpeg', 0.7);
+        });
+    }
+}
+
+// Hacer disponible globalmente
+window.LandmarkDetector = LandmarkDetector;
@@ -5,6 +5,10 @@ let socket = null;
 let currentUser = null;
 let isConnected = false;
 
+// Salas del lobby (id -> sala) y versión de la lista de cada worker del servidor
+let lobbyRooms = new Map();
+let lobbyVersions = null;
+
 // Inicialización cuando se carga la página
 function initializeLobby() {
     console.log('🔧 Inicializando lobby');
@@ -86,10 +90,16 @@ function setupSocketEvents() {
     socket.on('room_list_updated', function (data) {
         console.log('📋 Lista de salas actualizada:', data);
         if (data.available_rooms) {
-            updateRooms(data.available_rooms);
+            setRooms(data.available_rooms, data.versions);
         }
     });
 
+    // Solo los cambios desde el último envío (salas nuevas, cambiadas o cerradas)
+    socket.on('room_list_delta', function (delta) {
+        console.log('📋 Cambios en salas:', delta);
+        applyRoomsDelta(delta);
+    });
+
     socket.on('joined_room', function (data) {
         console.log('🚪 Te uniste a la sala:', data);
         if (data.room_id) {
@@ -266,7 +276,38 @@ function showLobby(data) {
         console.log('✅ Nombre actualizado:', data.username);
     }
 
-    updateRooms(data.available_rooms || []);
+    setRooms(data.available_rooms || [], data.versions);
+}
+
+function setRooms(rooms, versions) {
+    lobbyRooms = new Map(rooms.map(room => [room.id, room]));
+    lobbyVersions = versions === undefined ? null : new Map(Object.entries(versions));
+    updateRooms(Array.from(lobbyRooms.values()));
+}
+
+function applyRoomsDelta(delta) {
+    // Sin lista base todavía
+    if (lobbyVersions === null) {
+        return;
+    }
+    // Cada worker numera sus propios cambios (un worker nuevo empieza en 0)
+    const worker = delta.worker || '';
+    const current = lobbyVersions.has(worker) ? lobbyVersions.get(worker) : 0;
+    // Cambio ya incluido en la lista que tenemos
+    if (delta.version <= current) {
+        return;
+    }
+    // Nos perdimos algún envío: pedir la lista completa
+    if (delta.from_version !== current) {
+        console.log('🔄 Faltan cambios de salas, pidiendo la lista completa');
+        refreshRooms();
+        return;
+    }
+
+    delta.removed.forEach(roomId => lobbyRooms.delete(roomId));
+    delta.added.concat(delta.changed).forEach(room => lobbyRooms.set(room.id, room));
+    lobbyVersions.set(worker, delta.version);
+    updateRooms(Array.from(lobbyRooms.values()));
 }
 
 function updateRooms(rooms) {
@@ -0,0 +1,95 @@
+"""
+Locks que miden cuánto se esperó para tomarlos.
+
+El camino sin contención es un acquire no bloqueante; solo cuando otro hilo
+tiene el lock se mide la espera. Los contadores se actualizan con el lock ya
+tomado, así que no necesitan un lock propio.
+"""
+
+import threading
+import time
+
+
+class TimedLock:
+    def __init__(self, reentrant=False):
+        """
+        Lock (o RLock) con métricas de espera, usable con with.
+
+        Args:
+            reentrant: Si True, el mismo hilo puede tomarlo varias veces
+        """
+        self._lock = threading.RLock() if reentrant else threading.Lock()
+
+        # Métricas
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self):
+        if not self._lock.acquire(blocking=False):
+            started = time.perf_counter()
+            self._lock.acquire()
+            waited = time.perf_counter() - started
+            self.contended += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+        self.acquisitions += 1
+        return True
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self):
+        """
+        Métricas de este lock.
+        """
+        return lock_stats([self])
+
+
+def lock_stats(locks, retired=None):
+    """
+    Métricas agregadas de varios locks (por ejemplo, uno por sala).
+
+    Args:
+        locks: TimedLocks a sumar
+        retired: Totales de locks que ya no existen (ver retire_lock)
+
+    Returns:
+        stats: Adquisiciones, esperas y tiempos de espera en milisegundos
+    """
+    totals = dict(retired or new_lock_totals())
+    for lock in locks:
+        totals['acquisitions'] += lock.acquisitions
+        totals['contended'] += lock.contended
+        totals['wait_seconds'] += lock.wait_seconds
+        totals['max_wait'] = max(totals['max_wait'], lock.max_wait)
+
+    return {
+        'acquisitions': totals['acquisitions'],
+        'contended': totals['contended'],
+        'total_wait_ms': round(totals['wait_seconds'] * 1000, 3),
+        'avg_wait_ms': round(totals['wait_seconds'] * 1000 / totals['acquisitions'], 4)
+        if totals['acquisitions'] else 0.0,
+        'max_wait_ms': round(totals['max_wait'] * 1000, 3)
+    }
+
+
+def new_lock_totals():
+    return {'acquisitions': 0, 'contended': 0, 'wait_seconds': 0.0, 'max_wait': 0.0}
+
+
+def retire_lock(totals, lock):
+    """
+    Suma a totals las métricas de un lock que deja de usarse.
+    """
+    totals['acquisitions'] += lock.acquisitions
+    totals['contended'] += lock.contended
+    totals['wait_seconds'] += lock.wait_seconds
+    totals['max_wait'] = max(totals['max_wait'], lock.max_wait)
@@ -0,0 +1,102 @@
+"""
+Carga diferida del stack de visión (OpenCV, NumPy, MediaPipe).
+
+Importar MediaPipe tarda casi un segundo. El lobby, las salas y Socket.IO no
+lo necesitan, así que el servidor arranca sin él y lo carga en segundo plano
+o con la primera captura.
+"""
+
+import threading
+import time
+
+
+class VisionLoader:
+    def __init__(self, load):
+        """
+        Carga única y thread-safe del stack de visión.
+
+        Args:
+            load: Función sin argumentos que importa y arranca la inferencia;
+                lanza ImportError si falta alguna dependencia
+        """
+        self._load = load
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+        # idle, loading, ready, unavailable
+        self.state = 'idle'
+        self.error = None
+        self.load_ms = None
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def start(self, background=True):
+        """
+        Empieza la carga (no hace nada si ya empezó).
+
+        Args:
+            background: Si True carga en un hilo aparte; si False, en este
+        """
+        with self._lock:
+            if self.state != 'idle':
+                return
+            self.state = 'loading'
+
+        if background:
+            threading.Thread(target=self._run, name='vision-loader', daemon=True).start()
+        else:
+            self._run()
+
+    def ensure_ready(self, timeout=None, sleep=time.sleep, interval=0.01):
+        """
+        Empieza la carga en segundo plano si nadie lo hizo y espera a que
+        termine.
+
+        La espera es un sondeo con sleep: con socketio.sleep el loop de
+        Socket.IO sigue atendiendo las demás salas mientras carga.
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+            sleep: Función de espera entre sondeos
+            interval: Segundos entre sondeos
+
+        Returns:
+            ready: True si la visión está disponible
+        """
+        self.start(background=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._done.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            sleep(interval)
+        return self.ready
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self._load()
+            self.state = 'ready'
+        except Exception as e:
+            # ImportError en despliegues sin OpenCV/MediaPipe
+            self.error = str(e)
+            self.state = 'unavailable'
+            print(f"⚠️ Visión no disponible, usando fallback: {e}")
+        finally:
+            self.load_ms = (time.perf_counter() - started) * 1000
+            self._done.set()
+
+        if self.ready:
+            print(f"✅ Visión lista en {self.load_ms:.0f} ms")
+
+    def status(self):
+        """
+        Estado de la carga para /health y /stats.
+        """
+        return {
+            'state': self.state,
+            'ready': self.ready,
+            'load_ms': round(self.load_ms, 1) if self.load_ms is not None else None,
+            'error': self.error
+        }
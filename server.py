@@ -6,7 +6,7 @@ Optimizado para Railway y otros servicios de hosting
 
 import os
 import sys
-from rps_online.app import app, socketio
+from rps_online.app import app, socketio, start_inference
 
 def main():
     """Función principal para producción"""
@@ -28,6 +28,9 @@ def main():
     print("   📱 Responsive design")
     print("-" * 50)
     
+    # Cargar y calentar la visión (en segundo plano salvo VISION_LOAD=eager)
+    start_inference()
+    
     try:
         # Ejecutar servidor con configuración de producción
         socketio.run(
@@ -0,0 +1,38 @@
+"""
+Utilidades compartidas por las pruebas: los módulos de rps_online y de la
+raíz se importan como lo hace el servidor.
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'rps_online')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture
+def load_app(monkeypatch):
+    """
+    Importa una copia nueva de app.py como el worker indicado, con el
+    almacén indicado (None = el que arma la app).
+    """
+    def load(worker='', store=None):
+        if store is not None:
+            # La app abre el almacén al importarse (número de arranque incluido)
+            import state_store
+            monkeypatch.setattr(state_store, 'open_store', lambda url: store)
+        monkeypatch.setenv('WORKER_ID', worker)
+        monkeypatch.setenv('INFERENCE_WORKERS', '0')
+        monkeypatch.setenv('VISION_LOAD', 'lazy')
+        monkeypatch.setenv('LOBBY_UPDATE_INTERVAL', '0.05')
+        spec = importlib.util.spec_from_file_location(f"app_{worker or 'solo'}",
+                                                      os.path.join(APP_DIR, 'app.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    return load
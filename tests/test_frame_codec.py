@@ -0,0 +1,63 @@
+"""
+Validación de los landmarks que envía el navegador.
+
+    python -m pytest tests
+"""
+
+import math
+
+import pytest
+
+from frame_codec import capture_bytes, parse_landmarks
+
+HAND = [[100 + i, 200 + i] for i in range(21)]
+
+
+def test_valid_landmarks_become_float_pixels():
+    assert parse_landmarks(HAND) == [[float(x), float(y)] for x, y in HAND]
+
+
+def test_normalized_landmarks_are_scaled():
+    points = [[0.5, 0.25]] * 21
+    assert parse_landmarks(points, width=640, height=480, normalized=True) == [[320.0, 120.0]] * 21
+
+
+@pytest.mark.parametrize('points', [
+    None,
+    'mano',
+    HAND[:20],
+    HAND + [[0, 0]],
+    {'x': 1},
+])
+def test_wrong_number_of_points_is_rejected(points):
+    with pytest.raises(ValueError):
+        parse_landmarks(points)
+
+
+@pytest.mark.parametrize('bad_point', [
+    None,
+    [1],
+    '12',
+    ['1', 2],
+    [True, 2],
+    [1, None],
+    [math.nan, 2],
+    [1, math.inf],
+    [10000, 2],
+    [1, -1000],
+])
+def test_malformed_point_is_rejected(bad_point):
+    points = HAND[:10] + [bad_point] + HAND[11:]
+    with pytest.raises(ValueError):
+        parse_landmarks(points)
+
+
+@pytest.mark.parametrize('width, height', [(0, 480), (640, -1), (5000, 480), ('640', 480), (640, None)])
+def test_invalid_image_size_is_rejected(width, height):
+    with pytest.raises(ValueError):
+        parse_landmarks(HAND, width=width, height=height)
+
+
+def test_capture_bytes_accepts_binary_and_data_url():
+    assert capture_bytes(b'\xff\xd8jpeg') == b'\xff\xd8jpeg'
+    assert capture_bytes('data:image/jpeg;base64,/9hqcGVn') == b'\xff\xd8jpeg'
@@ -0,0 +1,47 @@
+"""
+Clasificación de gestos: una mano, un lote y el código escalar original
+deben dar el mismo resultado.
+
+    python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from benchmark import LegacyGestureRecognizer, synthetic_hands
+from gesture_core import GESTURES, PROFILES, GestureClassifier
+
+HANDS = synthetic_hands(1000)
+
+
+@pytest.mark.parametrize('profile', sorted(PROFILES))
+@pytest.mark.parametrize('normalized', [True, False])
+def test_classify_matches_classify_batch(profile, normalized):
+    hand_size = PROFILES[profile]['hand_size'] if normalized else None
+    classifier = GestureClassifier(profile, hand_size=hand_size)
+
+    one_by_one = [classifier.classify(hand.tolist()) for hand in HANDS]
+    batch = classifier.classify_batch(HANDS)
+
+    assert batch.tolist() == one_by_one
+    # El corpus tiene de todo: si no, la comparación no probaría nada
+    assert set(one_by_one) == set(GESTURES) | {'unknown'}
+
+
+def test_desktop_matches_original_scalar_rules():
+    # El original compara píxeles absolutos: sin normalizar la mano
+    classifier = GestureClassifier('desktop', hand_size=None)
+    legacy = LegacyGestureRecognizer()
+
+    for hand in HANDS:
+        landmarks = hand.tolist()
+        assert classifier.classify(landmarks) == legacy.recognize_rock_paper_scissors(landmarks)
+
+
+def test_malformed_landmarks_are_unknown():
+    classifier = GestureClassifier('online')
+    assert classifier.classify([[0, 0]] * 20) == 'unknown'
+    assert classifier.classify([[0, 0, 0]] * 21) == 'unknown'
+    assert classifier.classify('mano') == 'unknown'
+    with pytest.raises(ValueError):
+        classifier.classify_batch(np.zeros((21, 2)))
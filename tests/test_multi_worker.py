@@ -0,0 +1,204 @@
+"""
+Modo multi-worker: dos instancias del servidor sobre un mismo almacén.
+
+Cada instancia es una copia independiente de rps_online/app.py (su propio
+Flask, Socket.IO, registro de salas y WORKER_ID) y ambas comparten un
+MemoryStore, el almacén falso en proceso.
+
+    python -m pytest tests
+"""
+
+import time
+
+import pytest
+
+from state_store import MemoryStore, store_url
+
+
+def connect(worker, username):
+    client = worker.socketio.test_client(worker.app)
+    client.emit('join_lobby', {'username': username})
+    lobby = [e for e in client.get_received() if e['name'] == 'lobby_joined'][0]['args'][0]
+    return client, lobby
+
+
+def create_room(worker, username):
+    client, _ = connect(worker, username)
+    client.emit('create_room')
+    room_id = [e for e in client.get_received()
+               if e['name'] == 'room_created'][0]['args'][0]['room_id']
+    return client, room_id
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def store():
+    return MemoryStore()
+
+
+@pytest.fixture
+def workers(store, load_app):
+    return load_app('w1', store), load_app('w2', store)
+
+
+def test_rooms_are_claimed_by_their_worker(workers, store):
+    w1, w2 = workers
+    _, room_1 = create_room(w1, 'ana')
+    _, room_2 = create_room(w2, 'beto')
+
+    assert room_1.startswith('room_w1-')
+    assert room_2.startswith('room_w2-')
+    assert store.room_owner(room_1) == 'w1'
+    assert store.room_owner(room_2) == 'w2'
+
+
+def test_join_on_other_worker_redirects_to_owner(workers):
+    w1, w2 = workers
+    _, room_id = create_room(w1, 'ana')
+
+    guest, _ = connect(w2, 'beto')
+    guest.emit('join_room_request', {'room_id': room_id})
+    events = guest.get_received()
+
+    assert [e['name'] for e in events] == ['room_joined']
+    assert events[0]['args'][0] == {'room_id': room_id, 'redirect': True, 'worker': 'w1'}
+    # El worker que no es dueño no crea una copia de la sala
+    assert room_id not in w2.game_rooms
+
+
+def test_join_unknown_room_does_nothing(workers):
+    _, w2 = workers
+    guest, _ = connect(w2, 'beto')
+    guest.emit('join_room_request', {'room_id': 'room_w9-0zz'})
+    assert guest.get_received() == []
+
+
+def test_lobby_merges_workers_with_their_versions(workers, store):
+    w1, w2 = workers
+    watcher, _ = connect(w1, 'lu')
+    _, room_id = create_room(w1, 'ana')
+
+    # w1 envía sus diferencias y publica su lista en el almacén
+    assert wait_for(lambda: 'w1' in store.lobby_states())
+    deltas = [e['args'][0] for e in watcher.get_received() if e['name'] == 'room_list_delta']
+    assert deltas and deltas[-1]['worker'] == 'w1'
+
+    _, lobby = connect(w2, 'beto')
+    assert [room['id'] for room in lobby['available_rooms']] == [room_id]
+    assert lobby['versions'] == {'w1': deltas[-1]['version'], 'w2': 0}
+
+
+def test_worker_lobby_expires(store):
+    store.set_lobby('w1', {'available_rooms': [], 'version': 3}, ttl=0.05)
+    assert 'w1' in store.lobby_states()
+    time.sleep(0.1)
+    assert store.lobby_states() == {}
+
+
+def test_empty_room_releases_its_claim(workers, store):
+    w1, _ = workers
+    host, room_id = create_room(w1, 'ana')
+    assert store.room_owner(room_id) == 'w1'
+
+    host.disconnect()
+
+    assert room_id not in w1.game_rooms
+    assert store.room_owner(room_id) is None
+
+
+def test_claimed_id_is_skipped(workers, store):
+    w1, _ = workers
+    # Otro worker con el mismo nombre ya reservó el próximo ID
+    taken = iter(['room_w1-0aa', 'room_w1-1bb'])
+    w1.room_ids.allocate = lambda prefix: next(taken)
+    store.claim_room('room_w1-0aa', 'w1')
+
+    assert w1.allocate_room_id('room') == 'room_w1-1bb'
+
+
+def test_duplicate_worker_name_raises(workers, store):
+    w1, _ = workers
+    w1.room_ids.allocate = lambda prefix: 'room_w1-0aa'
+    store.claim_room('room_w1-0aa', 'w1')
+
+    with pytest.raises(RuntimeError):
+        w1.allocate_room_id('room')
+
+
+def test_store_url_from_message_queue():
+    assert store_url(None, None) == 'memory://'
+    assert store_url(None, 'redis://cola:6379/0') == 'redis://cola:6379/0'
+    assert store_url('redis://estado', 'amqp://cola') == 'redis://estado'
+    with pytest.raises(ValueError, match='STATE_STORE_URL'):
+        store_url(None, 'amqp://cola')
+
+
+def test_reaper_reschedules_after_a_failure(workers, monkeypatch):
+    w1, _ = workers
+
+    def unreachable():
+        raise ConnectionError("almacén caído")
+
+    monkeypatch.setattr(w1, 'publish_lobby_state', unreachable)
+    with pytest.raises(ConnectionError):
+        w1.reap_rooms()
+
+    pending = [timer.callback for _, _, timer in w1.round_scheduler._heap if not timer.cancelled]
+    assert w1.reap_rooms in pending
+
+
+def test_restarted_worker_gets_a_new_epoch(store, load_app):
+    first = load_app('w1', store)
+    restarted = load_app('w1', store)
+    assert first.room_ids.epoch == 1
+    assert restarted.room_ids.epoch == 2
+    assert restarted.room_ids.allocate('room').startswith('room_w1-2.')
+
+
+def test_claims_expire_unless_refreshed(store):
+    store.claim_room('room_w1-1.0aa', 'w1', ttl=0.05)
+    store.claim_room('room_w1-1.1bb', 'w1', ttl=0.05)
+    store.refresh_rooms(['room_w1-1.0aa'], 'w1', ttl=10)
+    time.sleep(0.1)
+
+    # La sala renovada sigue siendo de w1; la otra quedó libre
+    assert store.room_owner('room_w1-1.0aa') == 'w1'
+    assert store.room_owner('room_w1-1.1bb') is None
+    assert store.claim_room('room_w1-1.1bb', 'w2')
+
+
+def test_reaper_refreshes_the_worker_claims(workers, store, monkeypatch):
+    w1, _ = workers
+    _, room_id = create_room(w1, 'ana')
+
+    # Cada pasada del reaper renueva la reserva con ROOM_CLAIM_TTL
+    monkeypatch.setattr(w1, 'ROOM_CLAIM_TTL', 0.05)
+    w1.reap_rooms()
+    assert store.room_owner(room_id) == 'w1'
+
+    # Sin otra pasada (worker caído), la reserva caduca
+    time.sleep(0.1)
+    assert store.room_owner(room_id) is None
+
+
+@pytest.mark.parametrize('event', ['create_room', 'create_ai_game'])
+def test_failed_claim_replies_with_an_error(workers, store, event):
+    w1, _ = workers
+    w1.room_ids.allocate = lambda prefix: f"{prefix}_w1-1.0aa"
+    store.claim_room('room_w1-1.0aa', 'w1')
+    store.claim_room('ai_w1-1.0aa', 'w1')
+
+    client, _ = connect(w1, 'ana')
+    client.emit(event)
+    events = client.get_received()
+
+    assert [e['name'] for e in events] == ['error']
+    assert len(w1.game_rooms) == 0
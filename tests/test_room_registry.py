@@ -0,0 +1,156 @@
+"""
+Diferencias del lobby de RoomRegistry: versiones encadenadas y lista
+publicada coherente con su versión.
+
+    python -m pytest tests
+"""
+
+import sys
+import threading
+import time
+
+from room_registry import RoomRegistry
+from timed_lock import TimedLock
+
+
+class Room:
+    """Sala mínima con lo que lee el registro."""
+
+    def __init__(self, room_id, players=1):
+        self.room_id = room_id
+        self.players = {f"p{n}": {} for n in range(players)}
+        self.status = 'waiting'
+        self.is_ai_game = False
+        self.created_at = time.time()
+        self.last_activity = self.created_at
+        self.lock = TimedLock(reentrant=True)
+
+    def is_full(self):
+        return len(self.players) >= 2
+
+
+def ids(rooms):
+    return [room['id'] for room in rooms]
+
+
+def test_first_delta_publishes_the_open_rooms():
+    registry = RoomRegistry()
+    registry.add(Room('room_a'))
+    registry.add(Room('room_b', players=2))
+
+    # Hasta el primer envío, quien llega ve la lista publicada (vacía)
+    assert registry.lobby_state() == {'available_rooms': [], 'version': 0}
+
+    delta = registry.pop_lobby_delta()
+    assert ids(delta['added']) == ['room_a']
+    assert delta['changed'] == [] and delta['removed'] == []
+    assert registry.lobby_state() == {'available_rooms': delta['added'], 'version': delta['version']}
+
+
+def test_room_added_and_removed_in_one_window_is_not_sent():
+    registry = RoomRegistry()
+    registry.add(Room('room_a'))
+    first = registry.pop_lobby_delta()
+
+    registry.add(Room('room_b'))
+    registry.remove('room_b')
+
+    assert registry.pop_lobby_delta() is None
+    assert ids(registry.lobby_state()['available_rooms']) == ['room_a']
+
+    # El siguiente cambio encadena desde la última versión enviada
+    registry.remove('room_a')
+    delta = registry.pop_lobby_delta()
+    assert delta['removed'] == ['room_a']
+    assert delta['from_version'] == first['version']
+    assert delta['version'] > first['version']
+
+
+def test_versions_chain_across_windows():
+    registry = RoomRegistry()
+    room = Room('room_a')
+    registry.add(room)
+    deltas = [registry.pop_lobby_delta()]
+
+    # La sala se llena y vuelve a abrirse en una ventana: nada que enviar
+    room.players['p1'] = {}
+    registry.refresh('room_a')
+    del room.players['p1']
+    registry.refresh('room_a')
+    assert registry.pop_lobby_delta() is None
+
+    # Se llena de nuevo (y se mantiene) junto con otra sala nueva
+    room.players['p1'] = {}
+    registry.refresh('room_a')
+    registry.add(Room('room_b'))
+    deltas.append(registry.pop_lobby_delta())
+    registry.remove('room_b')
+    deltas.append(registry.pop_lobby_delta())
+
+    assert deltas[0]['from_version'] == 0
+    for previous, delta in zip(deltas, deltas[1:]):
+        assert delta['from_version'] == previous['version']
+    assert deltas[1]['removed'] == ['room_a'] and ids(deltas[1]['added']) == ['room_b']
+    assert deltas[2]['removed'] == ['room_b']
+    assert registry.lobby_state()['version'] == deltas[-1]['version']
+
+
+def test_snapshot_read_racing_deltas_matches_its_version():
+    registry = RoomRegistry()
+    rooms = [Room(f"room_{n}") for n in range(20)]
+    for room in rooms:
+        registry.add(room)
+
+    deltas = []
+    snapshots = []
+    done = threading.Event()
+    reading = threading.Event()
+
+    def publish():
+        reading.wait()
+        for step in range(2000):
+            room = rooms[step % len(rooms)]
+            # Alternar entre abierta (1 jugador) y llena (2)
+            if len(room.players) == 1:
+                room.players['guest'] = {}
+            else:
+                del room.players['guest']
+            registry.refresh(room.room_id)
+            delta = registry.pop_lobby_delta()
+            if delta:
+                deltas.append(delta)
+        done.set()
+
+    def read():
+        reading.set()
+        while not done.is_set():
+            state = registry.lobby_state()
+            snapshots.append((state['version'], ids(state['available_rooms'])))
+
+    # Cambios de hilo muy frecuentes para que lector y escritor se intercalen
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=publish), threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    # Reaplicar las diferencias en orden da la lista de cada versión
+    published = {0: []}
+    current = {}
+    for delta in deltas:
+        assert delta['from_version'] in published
+        for entry in delta['added'] + delta['changed']:
+            current[entry['id']] = entry
+        for room_id in delta['removed']:
+            current.pop(room_id, None)
+        published[delta['version']] = sorted(current)
+
+    # El lector vio varias versiones mientras se publicaban
+    assert len({version for version, _ in snapshots}) > 1
+    for version, room_ids in snapshots:
+        assert sorted(room_ids) == published[version]
@@ -0,0 +1,87 @@
+"""
+Loop de timers de las rondas: un fallo no puede dejarlo parado.
+
+    python -m pytest tests
+"""
+
+import threading
+import time
+
+from round_scheduler import RoundScheduler
+
+
+class FakeSocketIO:
+    """Socket.IO mínimo: hilos reales y emits que pueden fallar."""
+
+    def __init__(self):
+        self.emitted = []
+        self.fail_emits = 0
+
+    def start_background_task(self, target):
+        def run():
+            # Como una tarea de eventlet: si termina con error, solo muere ella
+            try:
+                target()
+            except BaseException:
+                pass
+        threading.Thread(target=run, daemon=True).start()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def emit(self, event, data, to=None):
+        if self.fail_emits:
+            self.fail_emits -= 1
+            raise ConnectionError("cola de mensajes caída")
+        self.emitted.append((event, to))
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_failed_emit_does_not_stop_the_loop():
+    socketio = FakeSocketIO()
+    socketio.fail_emits = 1
+    scheduler = RoundScheduler(socketio, tick=0.01)
+
+    scheduler.schedule(0, lambda: [('countdown', {'count': 3}, 'room_a')])
+    assert wait_for(lambda: scheduler.errors == 1)
+
+    scheduler.schedule(0, lambda: [('countdown', {'count': 2}, 'room_a')])
+    assert wait_for(lambda: socketio.emitted == [('countdown', 'room_a')])
+
+
+def test_failing_callback_keeps_other_timers():
+    socketio = FakeSocketIO()
+    scheduler = RoundScheduler(socketio, tick=0.01)
+
+    def broken():
+        raise RuntimeError("sala rota")
+
+    scheduler.schedule(0, broken)
+    scheduler.schedule(0, lambda: [('capture_gesture', {'round': 1}, 'room_b')])
+
+    assert wait_for(lambda: socketio.emitted == [('capture_gesture', 'room_b')])
+    assert scheduler.stats()['errors'] == 1
+
+
+def test_loop_restarts_after_it_ends():
+    socketio = FakeSocketIO()
+    scheduler = RoundScheduler(socketio, tick=0.01)
+    calls = []
+
+    # Un sleep que falla termina el loop: el próximo schedule lo relanza
+    real_sleep = socketio.sleep
+    socketio.sleep = lambda seconds: (_ for _ in ()).throw(SystemExit())
+    scheduler.schedule(0, lambda: calls.append(1))
+    assert wait_for(lambda: calls == [1] and not scheduler._running)
+
+    socketio.sleep = real_sleep
+    scheduler.schedule(0, lambda: calls.append(2))
+    assert wait_for(lambda: calls == [1, 2])
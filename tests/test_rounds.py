@@ -0,0 +1,78 @@
+"""
+Estados de una ronda: cuándo cuenta una captura y cuándo arranca la cuenta.
+
+    python -m pytest tests
+"""
+
+import pytest
+
+
+@pytest.fixture
+def server(load_app):
+    return load_app()
+
+
+@pytest.fixture
+def room(server):
+    room = server.GameRoom('room_test')
+    room.players = {
+        'p1': {'id': 'p1', 'username': 'ana', 'ready': False, 'gesture': None},
+        'p2': {'id': 'p2', 'username': 'beto', 'ready': False, 'gesture': None},
+    }
+    server.game_rooms.add(room)
+    return room
+
+
+PLAYER = {'id': 'p1', 'username': 'ana'}
+
+
+def test_capture_for_the_current_round_counts(server, room):
+    room.status, room.round = 'capture', 2
+    assert server.accepts_capture(room, 2, PLAYER)
+
+
+def test_capture_without_round_counts_for_the_current_one(server, room):
+    # Clientes con un game.js antiguo no envían la ronda
+    room.status, room.round = 'capture', 2
+    assert server.accepts_capture(room, None, PLAYER)
+
+
+def test_stale_round_is_rejected(server, room):
+    room.status, room.round = 'capture', 2
+    assert not server.accepts_capture(room, 1, PLAYER)
+
+
+@pytest.mark.parametrize('status', ['waiting', 'ready', 'countdown', 'results'])
+def test_capture_outside_the_capture_state_is_rejected(server, room, status):
+    room.status = status
+    assert not server.accepts_capture(room, None, PLAYER)
+    assert not server.accepts_capture(room, room.round, PLAYER)
+
+
+@pytest.fixture
+def scheduled(server, monkeypatch):
+    """Timers programados, sin ejecutarlos"""
+    calls = []
+    monkeypatch.setattr(server.round_scheduler, 'schedule',
+                        lambda delay, callback, *args: calls.append((callback, args)))
+    return calls
+
+
+@pytest.mark.parametrize('status', ['waiting', 'ready'])
+def test_countdown_starts_from_waiting(server, room, scheduled, status):
+    room.status = status
+    server.start_countdown(room.room_id)
+
+    assert room.status == 'countdown'
+    assert scheduled == [(server.countdown_step, (room.room_id, room.round, 0))]
+
+
+@pytest.mark.parametrize('status', ['countdown', 'capture', 'results', 'empty'])
+def test_repeated_ready_does_not_restart_the_round(server, room, scheduled, status):
+    room.status = status
+    room.gestures = {'p1': 'rock'}
+    server.start_countdown(room.room_id)
+
+    assert room.status == status
+    assert room.gestures == {'p1': 'rock'}
+    assert scheduled == []
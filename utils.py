@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+import threading
 import time
 import math
 
@@ -48,6 +49,9 @@ class FPSCounter:
         self.fps_history = []
         self.max_history = 30  # Mantener los últimos 30 valores para promedio
         
+        # Tiempos por etapa (captura, inferencia, render...) en segundos
+        self.stage_history = {}
+        
     def update(self):
         """
         Actualiza el cálculo de FPS.
@@ -77,6 +81,88 @@ class FPSCounter:
         fps_text = f"FPS: {fps:.1f}"
         cv2.putText(image, fps_text, (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    
+    def record_stage(self, name, seconds):
+        """
+        Registra cuánto tardó una etapa del bucle en este frame.
+        
+        Args:
+            name: Nombre de la etapa (por ejemplo "captura" o "inferencia")
+            seconds: Duración en segundos
+        """
+        history = self.stage_history.setdefault(name, [])
+        history.append(seconds)
+        if len(history) > self.max_history:
+            history.pop(0)
+    
+    def stage_times(self):
+        """
+        Promedio reciente de cada etapa.
+        
+        Returns:
+            stage_times: Diccionario nombre -> milisegundos
+        """
+        return {
+            name: 1000 * sum(history) / len(history)
+            for name, history in list(self.stage_history.items()) if history
+        }
+    
+    def draw_stage_times(self, image):
+        """
+        Dibuja el tiempo promedio de cada etapa sobre la línea del modo.
+        
+        Args:
+            image: Imagen donde dibujar
+        """
+        times = self.stage_times()
+        if not times:
+            return
+        text = " | ".join(f"{name}: {ms:.1f}ms" for name, ms in times.items())
+        cv2.putText(image, text, (10, image.shape[0] - 50), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+
+class LatestFrameQueue:
+    """
+    Cola de un solo elemento entre hilos: si el consumidor va atrasado, el
+    elemento nuevo reemplaza al anterior (gana el frame más reciente).
+    """
+    def __init__(self):
+        self._item = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self.dropped = 0  # Elementos reemplazados antes de ser leídos
+    
+    def put(self, item):
+        """
+        Publica un elemento, descartando el anterior si nadie lo leyó.
+        """
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify()
+    
+    def get(self, timeout=None):
+        """
+        Espera el próximo elemento.
+        
+        Returns:
+            item: El elemento más reciente, o None si se agotó el tiempo o
+                la cola se cerró
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+    
+    def close(self):
+        """
+        Despierta a los consumidores para que terminen.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
 
 
 def draw_gesture_info(image, gesture_info, position=(10, 70)):
@@ -255,7 +341,52 @@ def normalize_landmarks(landmarks, image_width, image_height):
     return normalized
 
 
-def smooth_landmarks(current_landmarks, previous_landmarks, alpha=0.7):
+def normalize_hand_landmarks(landmarks, hand_size=None):
+    """
+    Normaliza los landmarks por el tamaño de la mano (muñeca a MCP del medio)
+    en lugar del tamaño de la imagen, así las distancias no dependen de la
+    resolución ni de la distancia a la cámara.
+    
+    Args:
+        landmarks: Lista de coordenadas [x, y] absolutas
+        hand_size: Tamaño de referencia de la mano (por defecto
+            hand_features.HAND_SIZE_REFERENCE)
+        
+    Returns:
+        normalized_landmarks: Coordenadas con la mano reescalada alrededor de la muñeca
+        scale: Tamaño original de la mano en píxeles
+    """
+    from hand_features import HAND_SIZE_REFERENCE, normalize_hand
+    
+    points = np.asarray(landmarks, dtype=np.float64)
+    normalized, scale = normalize_hand(points, hand_size or HAND_SIZE_REFERENCE)
+    
+    return normalized.tolist(), float(scale)
+
+
+def extrapolate_landmarks(last_landmarks, previous_landmarks, steps):
+    """
+    Predice los landmarks unos frames más adelante suponiendo velocidad
+    constante entre las dos últimas detecciones.
+    
+    Args:
+        last_landmarks: Landmarks de la última detección
+        previous_landmarks: Landmarks de la detección anterior (o None)
+        steps: Frames transcurridos desde la última detección, en unidades
+            del intervalo entre ambas detecciones
+        
+    Returns:
+        predicted_landmarks: Lista de coordenadas [x, y] en float
+    """
+    last = np.asarray(last_landmarks, dtype=np.float64)
+    if previous_landmarks is None or len(previous_landmarks) != len(last_landmarks):
+        return last.tolist()
+    
+    velocity = last - np.asarray(previous_landmarks, dtype=np.float64)
+    return (last + velocity * steps).tolist()
+
+
+def smooth_landmarks(current_landmarks, previous_landmarks, alpha=0.7, round_to_int=True):
     """
     Suaviza los landmarks usando un filtro de paso bajo.
     
@@ -263,6 +394,7 @@ def smooth_landmarks(current_landmarks, previous_landmarks, alpha=0.7):
         current_landmarks: Landmarks actuales
         previous_landmarks: Landmarks del frame anterior
         alpha: Factor de suavizado (0-1)
+        round_to_int: Si False, conserva las coordenadas en float
         
     Returns:
         smoothed_landmarks: Landmarks suavizados
@@ -274,6 +406,8 @@ def smooth_landmarks(current_landmarks, previous_landmarks, alpha=0.7):
     for curr, prev in zip(current_landmarks, previous_landmarks):
         smooth_x = alpha * curr[0] + (1 - alpha) * prev[0]
         smooth_y = alpha * curr[1] + (1 - alpha) * prev[1]
-        smoothed.append([int(smooth_x), int(smooth_y)])
+        if round_to_int:
+            smooth_x, smooth_y = int(smooth_x), int(smooth_y)
+        smoothed.append([smooth_x, smooth_y])
     
     return smoothed
\ No newline at end of file